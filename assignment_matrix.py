@@ -0,0 +1,305 @@
+from contextlib import contextmanager
+
+import numpy as np
+
+from profiler import profiled
+
+"""
+This file contains the assignment matrix representation used by the greedy algorithm.
+The matrix has a row for every component of the application and a column for every virtual machine.
+A value of 1 at position [row, column] means that the component 'row' is deployed on the machine 'column'.
+It is backed by a NumPy array, so row sums, column lookups and resource totals are computed without Python loops.
+The matrix also keeps the number of deployed instances of every component and a journal of the modified cells,
+so that the constraints can be checked again only for the parts of the matrix that changed.
+Optionally, it also keeps the free space left on each machine, updated every time a component is placed or removed.
+"""
+
+
+class AssignmentMatrix:
+    """
+    An assignment matrix backed by a NumPy uint8 array
+
+    Copies are copy-on-write: the matrices share the same array until one of them is modified.
+    add_column builds a new matrix, while append_column adds the column in place, in an array that keeps some free
+    columns at the end, so most appends don't copy anything.
+    """
+
+    def __init__(self, data, shared=False, frequencies=None, changes=None):
+        """
+        Args:
+            data: A two dimensional NumPy array with the values of the assignment matrix
+            shared: A boolean value that is True if the array is also used by another matrix
+            frequencies: A NumPy array with the sum of every row of 'data', it is computed if it is not given
+            changes: A list with the (row, column) cells that were modified and were not yet popped
+        """
+        self._data = data
+        # The array that holds the values, it can have more columns than the matrix
+        self._buffer = data
+        self._shared = shared
+        if frequencies is None:
+            frequencies = data.sum(axis=1, dtype=np.int64)
+        self._frequencies = frequencies
+        self._changes = changes if changes is not None else []
+        # The free space of the machines, only kept after track_free_space was called
+        self._free_space = None
+        self._requirements = None
+        self.tracked_types = None
+
+    @classmethod
+    def from_list(cls, matrix):
+        """
+        Builds an assignment matrix from a list of lists, like the one found in the greedy input files
+
+        Args:
+            matrix: A list of lists, where each list represents a row of the assignment matrix
+
+        Returns:
+            assignment_matrix: The AssignmentMatrix that contains the same values as the given list
+        """
+        return cls(np.array(matrix, dtype=np.uint8, ndmin=2))
+
+    @property
+    def rows(self):
+        """
+        Returns:
+            rows: The number of rows (components) of the matrix
+        """
+        return self._data.shape[0]
+
+    @property
+    def columns(self):
+        """
+        Returns:
+            columns: The number of columns (machines) of the matrix
+        """
+        return self._data.shape[1]
+
+    def __getitem__(self, cell):
+        row, column = cell
+        return int(self._data[row, column])
+
+    def __setitem__(self, cell, value):
+        row, column = cell
+        if self._write(row, column, value):
+            self._changes.append((row, column))
+
+    def _write(self, row, column, value):
+        """
+        Sets the value of a cell and updates the number of instances and the free space, without using the journal
+
+        Returns:
+            modified: A boolean value that is True if the value of the cell changed
+        """
+        old_value = int(self._data[row, column])
+        if old_value == value:
+            return False
+        # Before the first write we make sure that no other matrix sees the change
+        if self._shared:
+            self._buffer = self._data.copy()
+            self._data = self._buffer
+            self._shared = False
+        self._data[row, column] = value
+        self._frequencies[row] += value - old_value
+        if self._free_space is not None and column < len(self._free_space):
+            self._free_space[column] -= (value - old_value) * self._requirements[row]
+        return True
+
+    @contextmanager
+    def trial(self, row, column, value=1):
+        """
+        Temporarily sets the value of a cell, the previous value is put back when the 'with' block ends
+        Since the matrix is the same at the end, the change is not written in the journal
+
+        Args:
+            row: The index of the row of the cell
+            column: The index of the column of the cell
+            value: The value that the cell has inside the 'with' block
+        """
+        old_value = int(self._data[row, column])
+        self._write(row, column, value)
+        try:
+            yield self
+        finally:
+            self._write(row, column, old_value)
+
+    @profiled('matrix copy')
+    def copy(self):
+        """
+        Returns a copy of the matrix, the actual values are copied only when one of the matrices is modified
+
+        Returns:
+            new_matrix: An AssignmentMatrix with the same values as this one
+        """
+        self._shared = True
+        new_matrix = AssignmentMatrix(self._data, shared=True, frequencies=self._frequencies.copy(),
+                                      changes=list(self._changes))
+        if self._free_space is not None:
+            new_matrix._free_space = self._free_space.copy()
+            new_matrix._requirements = self._requirements
+            new_matrix.tracked_types = self.tracked_types
+        return new_matrix
+
+    def frequency(self, component_id):
+        """
+        Computes the number of deployed instances of the component with the provided id
+
+        Args:
+            component_id: The index of the assignment matrix row that corresponds to the involved component
+
+        Returns:
+            frequency: The sum of the row that corresponds to the given component
+        """
+        return int(self._frequencies[component_id])
+
+    def frequencies(self):
+        """
+        Returns:
+            frequencies: A NumPy array with the number of deployed instances for every component
+        """
+        return self._frequencies.copy()
+
+    def deployed_components(self, column_id):
+        """
+        Args:
+            column_id: The index of the assignment matrix column that corresponds to the involved machine
+
+        Returns:
+            deployed_components: List that contains the id/id's of the component/s deployed on the given machine
+        """
+        return np.flatnonzero(self._data[:, column_id]).tolist()
+
+    def deployed_together(self, first_component_id, second_component_id):
+        """
+        Checks if there is a machine where both of the given components are deployed
+
+        Args:
+            first_component_id: The index of the row that corresponds to the first component
+            second_component_id: The index of the row that corresponds to the second component
+
+        Returns:
+            response: Boolean value that is True if the components share at least one machine
+        """
+        return bool(np.any(self._data[first_component_id] & self._data[second_component_id]))
+
+    def same_placement(self, first_component_id, second_component_id):
+        """
+        Checks if the given components are deployed on exactly the same machines
+
+        Args:
+            first_component_id: The index of the row that corresponds to the first component
+            second_component_id: The index of the row that corresponds to the second component
+
+        Returns:
+            response: Boolean value that is True if the two rows of the matrix are identical
+        """
+        return bool(np.array_equal(self._data[first_component_id], self._data[second_component_id]))
+
+    def column_resources(self, requirements, first_column=0):
+        """
+        Computes for every machine, starting from 'first_column', the sum of the resources of its deployed components
+
+        Args:
+            requirements: A NumPy array with a row for every component and a column for every hardware resource
+            first_column: The index of the first column for which the resources are computed
+
+        Returns:
+            resources: A NumPy array with a row for every machine and a column for every hardware resource
+        """
+        return self._data[:, first_column:].T.astype(np.int64) @ requirements
+
+    def track_free_space(self, capacities, requirements, types=None):
+        """
+        Starts keeping the free space left on every machine, after subtracting the resources of its components
+        From now on, the free space of a machine is updated only when one of its cells is modified
+
+        Args:
+            capacities: A NumPy array with a row for every machine and a column for every hardware resource
+            requirements: A NumPy array with a row for every component and a column for every hardware resource
+            types: The type array used to build the capacities, kept to know if they are still valid
+        """
+        self._requirements = requirements
+        self._free_space = capacities[:self.columns] - self.column_resources(requirements)[:len(capacities)]
+        self.tracked_types = list(types) if types is not None else None
+
+    def free_space(self, column_id):
+        """
+        Args:
+            column_id: The index of the assignment matrix column that corresponds to the involved machine
+
+        Returns:
+            free_space: A NumPy array with the free amount of every resource on the given machine
+        """
+        return self._free_space[column_id]
+
+    def columns_with_space(self, component_id):
+        """
+        Finds all the machines where the component with given id fits, keeping some space free for every resource
+
+        Args:
+            component_id: The index of the assignment matrix row that corresponds to the involved component
+
+        Returns:
+            columns: A list with the ids of the machines that have enough space, in ascending order
+        """
+        remaining_space = self._free_space - self._requirements[component_id]
+        return np.flatnonzero(np.all(remaining_space > 0, axis=1)).tolist()
+
+    @profiled('matrix add_column')
+    def add_column(self, component_id):
+        """
+        Builds a new matrix by adding a column to this one
+        The new column has 0 on every row but the one corresponding to the component with the parameter id
+
+        Args:
+            component_id: The index of the assignment matrix row that corresponds to the involved component
+
+        Returns:
+            new_matrix: A new AssignmentMatrix with the component with given id deployed on the last column
+        """
+        data = np.zeros((self.rows, self.columns + 1), dtype=np.uint8)
+        data[:, :-1] = self._data
+        data[component_id, -1] = 1
+        frequencies = self._frequencies.copy()
+        frequencies[component_id] += 1
+        return AssignmentMatrix(data, frequencies=frequencies,
+                                changes=self._changes + [(component_id, self.columns)])
+
+    @profiled('matrix append_column')
+    def append_column(self, component_id):
+        """
+        Adds in place a column to the matrix, with the component with given id deployed on it
+        When the array has no free column left it is copied to one with twice as many columns
+
+        Args:
+            component_id: The index of the assignment matrix row that corresponds to the involved component
+        """
+        columns = self.columns
+        if self._shared or self._buffer.shape[1] == columns:
+            buffer = np.zeros((self.rows, max(2 * columns, columns + 1)), dtype=np.uint8)
+            buffer[:, :columns] = self._data
+            self._buffer = buffer
+            self._shared = False
+        self._buffer[:, columns] = 0
+        self._buffer[component_id, columns] = 1
+        self._data = self._buffer[:, :columns + 1]
+        self._frequencies[component_id] += 1
+        self._changes.append((component_id, columns))
+
+    def pop_changes(self):
+        """
+        Returns the cells that were modified since the last call and empties the journal
+        A new column counts as a modification of the cell where its component is deployed
+
+        Returns:
+            changes: A list with the (row, column) cells that were modified
+        """
+        changes = self._changes
+        self._changes = []
+        return changes
+
+    def to_list(self):
+        """
+        Returns:
+            matrix: The matrix as a list of lists, in the same format used by the input and output files
+        """
+        return self._data.tolist()
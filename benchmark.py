@@ -0,0 +1,312 @@
+import json
+import random
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+import generator
+import main
+from assignment_matrix import AssignmentMatrix
+from offer_catalog import OfferCatalog
+
+"""
+This file is used to measure the performance of the greedy algorithms.
+Every case is run a number of times, and we write to a json file the median and the percentiles of the run times,
+together with the peak memory used by a run. The files of two commits can then be compared to find regressions.
+The cases are the Wordpress inputs (for every number of offers), the same inputs with synthetic catalogs of thousands
+of offers, and synthetic applications with hundreds of components.
+"""
+
+GREEDY_TYPES = ["min_vm", "distinct_vm"]
+
+
+def measure(function, repeats):
+    """
+    Runs a function 'repeats' times and computes statistics about its run time, then runs it once more to find the
+    peak memory it uses (tracemalloc slows down the code, so that run is not timed)
+
+    Args:
+        function: A function without parameters, the code that is measured
+        repeats: The number of timed runs
+
+    Returns:
+        statistics: A dictionary with the run times (in seconds), their median, percentiles, minimum and maximum,
+                    and the peak memory (in bytes)
+    """
+    run_times = []
+    for _ in range(repeats):
+        start_time = time.perf_counter()
+        function()
+        run_times.append(time.perf_counter() - start_time)
+
+    tracemalloc.start()
+    try:
+        function()
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'runs': run_times,
+        'median': float(np.median(run_times)),
+        'p90': float(np.percentile(run_times, 90)),
+        'p99': float(np.percentile(run_times, 99)),
+        'min': min(run_times),
+        'max': max(run_times),
+        'peak_memory': peak_memory
+    }
+
+
+def solve_case(assignment_matrix, component_id, types, prices, components_list, constraints_list, offers_list,
+               greedy_type):
+    """
+    Solves a problem in the same way as the batch mode of main.py, without writing the result
+
+    Args:
+        assignment_matrix: The assignment matrix of the existing solution
+        component_id: The id of the component that we want to add to the application
+        types: The type array of the existing solution
+        prices: The price array of the existing solution
+        components_list: The list of components involved in our problem and their hardware requirements
+        constraints_list: The compiled list with all the constraints of the problem
+        offers_list: The catalog of virtual machine offers
+        greedy_type: The greedy method that is applied, min_vm or distinct_vm
+
+    Returns:
+        result: The output dictionary or the error message returned by the greedy algorithm
+    """
+    # The matrix keeps its free space cache, so every run starts from a new copy
+    assignment_matrix = assignment_matrix.copy()
+    new_component_column = main.check_existing_machines(assignment_matrix, types, component_id, components_list,
+                                                        constraints_list, offers_list)
+    if new_component_column >= 0:
+        return main.solve_existing_machines(assignment_matrix, component_id, types, prices, components_list,
+                                            new_component_column, offers_list)
+    component_constraints = main.get_component_constraints(component_id, constraints_list)
+    return main.greedy(assignment_matrix, component_id, types, prices, components_list, component_constraints,
+                       constraints_list, offers_list, greedy_type, None)
+
+
+def synthetic_offers(offers_list, offers_number, seed):
+    """
+    Builds a catalog with 'offers_number' offers, that starts with the given offers and continues with random ones
+    The given offers keep their ids, so the type arrays of the existing solutions are still valid
+
+    Args:
+        offers_list: The list of real virtual machine offers
+        offers_number: The number of offers of the catalog
+        seed: The seed of the random number generator
+
+    Returns:
+        offers_list: A new list of offers, in the format returned by main.get_offers
+    """
+    offers = generator.generate_offers(max(offers_number - len(offers_list), 0), seed)
+    return list(offers_list) + [
+        {'Cpu': offer['cpu'], 'Memory': offer['memory'], 'Storage': offer['storage'], 'Price': offer['price']}
+        for offer in offers.values()
+    ]
+
+
+def synthetic_problem(components_number, offers_list, seed):
+    """
+    Builds a random application with the given number of components and a valid existing solution for it
+    Every instance is deployed on its own machine, so the conflicts and the lower bounds are fulfilled from the start
+
+    Args:
+        components_number: The number of components of the application
+        offers_list: The catalog of virtual machine offers used to choose the machines
+        seed: The seed of the random number generator
+
+    Returns:
+        problem: A tuple (assignment_matrix, types, prices, components_list, constraints_list)
+    """
+    random_generator = random.Random(seed)
+    components_list = []
+    for component_id in range(components_number):
+        cpu = random_generator.choice([1, 2, 4])
+        components_list.append({
+            'Name': f"Component{component_id}",
+            'Cpu': cpu,
+            'Memory': cpu,
+            'Storage': random_generator.choice([250, 500, 1000])
+        })
+
+    constraints_list = []
+    for component_id in range(components_number):
+        others = [other for other in range(components_number) if other != component_id]
+        constraints_list.append({"type": "Conflicts", "alphaCompId": component_id,
+                                 "compsIdList": random_generator.sample(others, min(3, len(others)))})
+    for component_id in random_generator.sample(range(components_number), components_number // 10):
+        constraints_list.append({"type": "Lower_Bound", "compsIdList": [component_id],
+                                 "bound": random_generator.randint(2, 3)})
+    constraints_list = main.compile_constraints(constraints_list)
+
+    bounds = {constraint['compsIdList'][0]: constraint['bound'] for constraint in constraints_list
+              if constraint['type'] == "Lower_Bound"}
+    deployed = [component_id for component_id in range(components_number)
+                for _ in range(bounds.get(component_id, 1))]
+    matrix = np.zeros((components_number, len(deployed)), dtype=np.uint8)
+    types = []
+    prices = []
+    for column, component_id in enumerate(deployed):
+        matrix[component_id, column] = 1
+        offer_id = offers_list.cheapest_fit(components_list[component_id])
+        types.append(offer_id)
+        prices.append(offers_list[offer_id]['Price'])
+    return AssignmentMatrix(matrix), types, prices, components_list, constraints_list
+
+
+def benchmark_inputs(problem_name, offers, lower_bound, upper_bound, component_to_add, repeats,
+                     catalog_sizes=()):
+    """
+    Measures both greedy algorithms on every existing greedy input of the problem
+
+    Args:
+        problem_name: The name of the problem, used to find the input files
+        offers: A list with the numbers of offers that are used
+        lower_bound: The first number of instances
+        upper_bound: The number of instances where we stop (it is not included)
+        component_to_add: The id of the component that we want to add to the application
+        repeats: The number of timed runs of every case
+        catalog_sizes: The numbers of offers of the synthetic catalogs, every input is also solved with each of them
+
+    Returns:
+        results: A dictionary that maps the name of every case to its statistics
+    """
+    problem_file = f"Input/Problem_Description/{problem_name}.json"
+    components_list = main.get_components(problem_file)
+    constraints_list = main.compile_constraints(main.get_constraints(problem_file))
+
+    results = {}
+    for offers_number in offers:
+        offers_list = main.get_offers(f"Input/Offers/offers_{offers_number}.json")
+        catalogs = {f"Offers{offers_number}": OfferCatalog(offers_list)}
+        for catalog_size in catalog_sizes:
+            catalogs[f"Offers{offers_number}+{catalog_size}"] = OfferCatalog(
+                synthetic_offers(offers_list, catalog_size, catalog_size))
+
+        for component_instances in range(lower_bound, upper_bound):
+            input_file = f"Input/Greedy_Input/{problem_name}{component_instances}_Offers{offers_number}_Input.json"
+            if not Path(input_file).is_file():
+                continue
+            existing_solution = main.parse_existing_solution(input_file)
+            assignment_matrix = AssignmentMatrix.from_list(existing_solution['Assignment Matrix'])
+            for catalog_name, catalog in catalogs.items():
+                for greedy_type in GREEDY_TYPES:
+                    results[f"{problem_name}{component_instances}_{catalog_name}_{greedy_type}"] = measure(
+                        lambda: solve_case(assignment_matrix, component_to_add, existing_solution["Type Array"],
+                                           existing_solution["Price Array"], components_list, constraints_list,
+                                           catalog, greedy_type),
+                        repeats)
+    return results
+
+
+def benchmark_synthetic(components_numbers, offers_number, repeats, seed=0):
+    """
+    Measures both greedy algorithms on synthetic applications, adding an instance of their first component
+
+    Args:
+        components_numbers: A list with the numbers of components of the applications
+        offers_number: The number of offers of the synthetic catalog
+        repeats: The number of timed runs of every case
+        seed: The seed used to build the applications and the catalog
+
+    Returns:
+        results: A dictionary that maps the name of every case to its statistics
+    """
+    offers_list = OfferCatalog(synthetic_offers([], offers_number, seed))
+    results = {}
+    for components_number in components_numbers:
+        assignment_matrix, types, prices, components_list, constraints_list = synthetic_problem(
+            components_number, offers_list, seed)
+        for greedy_type in GREEDY_TYPES:
+            results[f"Synthetic{components_number}_Offers{offers_number}_{greedy_type}"] = measure(
+                lambda: solve_case(assignment_matrix, 0, types, prices, components_list, constraints_list,
+                                   offers_list, greedy_type),
+                repeats)
+    return results
+
+
+def benchmark_catalogs(catalog_sizes, repeats, seed=0):
+    """
+    Measures the time needed to build synthetic offer catalogs, the part of the solving that depends the most on
+    the number of offers
+
+    Args:
+        catalog_sizes: A list with the numbers of offers of the catalogs
+        repeats: The number of timed runs of every case
+        seed: The seed used to build the offers
+
+    Returns:
+        results: A dictionary that maps the name of every case to its statistics
+    """
+    results = {}
+    for catalog_size in catalog_sizes:
+        offers_list = synthetic_offers([], catalog_size, seed)
+        results[f"Catalog_Offers{catalog_size}"] = measure(lambda: OfferCatalog(offers_list), repeats)
+    return results
+
+
+def get_commit():
+    """
+    Returns:
+        commit: The hash of the current git commit, or None if it can't be found
+    """
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def write_benchmark(file, results):
+    """
+    Writes the benchmark results to a json file, together with the commit and the date of the run
+
+    Args:
+        file: The path to the json file
+        results: A dictionary that maps the name of every case to its statistics
+    """
+    Path(file).parent.mkdir(parents=True, exist_ok=True)
+    with open(file, 'w') as f:
+        json.dump({'commit': get_commit(), 'date': datetime.now().isoformat(), 'results': results}, f, indent=2)
+
+
+def compare_benchmarks(old_file, new_file):
+    """
+    Compares the median run times of the cases found in two benchmark files
+
+    Args:
+        old_file: The path to the json file of the reference run
+        new_file: The path to the json file of the new run
+
+    Returns:
+        ratios: A dictionary that maps the name of every common case to new median / old median
+    """
+    with open(old_file) as f:
+        old_results = json.load(f)['results']
+    with open(new_file) as f:
+        new_results = json.load(f)['results']
+    return {case: new_results[case]['median'] / old_results[case]['median']
+            for case in new_results if case in old_results and old_results[case]['median'] > 0}
+
+
+if __name__ == '__main__':
+    problem_name = "Wordpress"
+    offers = [20, 40, 250, 500]
+    lower_bound = 3
+    upper_bound = 12
+    component_to_add = 0
+    repeats = 10
+    catalog_sizes = [5000, 50000]
+    components_numbers = [50, 100, 500]
+
+    results = benchmark_inputs(problem_name, offers, lower_bound, upper_bound, component_to_add, repeats,
+                               catalog_sizes)
+    results.update(benchmark_catalogs(catalog_sizes, repeats))
+    results.update(benchmark_synthetic(components_numbers, 5000, repeats))
+    write_benchmark(f"Output/Benchmarks/{datetime.now():%Y%m%d_%H%M%S}.json", results)
@@ -0,0 +1,130 @@
+import json
+import os
+
+from offer_catalog import load_offers
+
+"""
+This file is used to build the input data of the MiniZinc models from a problem description and an offers file.
+The data (N, HR, VMNR, compReq, vmOffers and prices) can be written as a DZN file, in the same format as the files
+from Input/DZN_Files, or assigned directly to a MiniZinc instance, without writing any file.
+Optionally, the offers that are dominated by a cheaper one are left out, together with the mapping from the kept
+offers to their ids in the offers file.
+"""
+
+# The hardware requirements of the model, in the order of the columns of compReq and vmOffers
+HARDWARE_REQUIREMENTS = ['Cpu', 'Memory', 'Storage']
+
+# The directory of the generated DZN files, next to the hand-written ones (which are never rewritten)
+DZN_DIRECTORY = os.path.join("Input", "DZN_Files", "Generated")
+
+
+def get_dzn_data(problem_file, offers_file, pruned=False):
+    """
+    Builds the data of the MiniZinc model for the given problem and offers
+
+    Args:
+        problem_file: The path to the file that contains the problem description (the components and constraints)
+        offers_file: The path to the file that contains the virtual machine offers
+        pruned: If it is True, the offers that are dominated by a cheaper one are left out
+
+    Returns:
+        data: A dictionary that maps the name of every parameter of the model to its value
+        offer_ids: A list with the position of every offer of 'vmOffers' in the offers file
+    """
+    with open(problem_file) as f:
+        components = json.load(f)['components']
+    offers = load_offers(offers_file, prune_dominated=pruned)
+    data = {
+        'N': len(components),
+        'HR': len(HARDWARE_REQUIREMENTS),
+        'VMNR': len(offers['Id']),
+        'compReq': [
+            [component['Compute']['CPU'], component['Compute']['Memory'], component['Storage']['StorageSize']]
+            for component in components
+        ],
+        'vmOffers': [list(offer) for offer in zip(*(offers[name].tolist() for name in HARDWARE_REQUIREMENTS))],
+        'prices': offers['Price'].tolist()
+    }
+    return data, offers['Id'].tolist()
+
+
+def format_dzn(data):
+    """
+    Builds the content of a DZN file, in the same format as the files from Input/DZN_Files
+
+    Args:
+        data: The data of the model, as returned by get_dzn_data
+
+    Returns:
+        content: The text of the DZN file
+    """
+    offers_rows = "\n".join(f"|{', '.join(map(str, offer))}, " for offer in data['vmOffers'])
+    requirements_rows = ",\n           ".join(f"| {', '.join(map(str, row))}" for row in data['compReq'])
+    prices = ", ".join(map(str, data['prices']))
+    return (
+        f"% number of components\n"
+        f"N = {data['N']};\n"
+        f"% number of hardware requirements\n"
+        f"HR = {data['HR']};\n"
+        f"% number of virtual machines offers\n"
+        f"VMNR = {data['VMNR']};\n"
+        f"% virtual machines offers\n"
+        f"vmOffers = [{offers_rows}|];\n"
+        f"             \n"
+        f"% minimum requirements for each component\n"
+        f"compReq = [{requirements_rows} |];\n"
+        f"           \n"
+        f"% the cost of virtual machines\n"
+        f"prices = [{prices} ];\n"
+    )
+
+
+def write_dzn(problem_file, offers_file, dzn_file, pruned=False):
+    """
+    Writes the DZN file of the given problem and offers, if it doesn't exist or it is older than one of them
+    The data is built only when the file is written
+
+    Args:
+        problem_file: The path to the file that contains the problem description (the components and constraints)
+        offers_file: The path to the file that contains the virtual machine offers
+        dzn_file: The path to the DZN file
+        pruned: If it is True, the offers that are dominated by a cheaper one are left out
+    """
+    if os.path.exists(dzn_file) and \
+            os.path.getmtime(dzn_file) >= max(os.path.getmtime(problem_file), os.path.getmtime(offers_file)):
+        return
+    data, _ = get_dzn_data(problem_file, offers_file, pruned)
+    if os.path.dirname(dzn_file):
+        os.makedirs(os.path.dirname(dzn_file), exist_ok=True)
+    with open(dzn_file, 'w') as f:
+        f.write(format_dzn(data))
+
+
+def assign_dzn_data(instance, problem_file, offers_file, pruned=False):
+    """
+    Assigns the data of the given problem and offers directly to a MiniZinc instance, instead of adding a DZN file
+
+    Args:
+        instance: The MiniZinc instance of the model
+        problem_file: The path to the file that contains the problem description (the components and constraints)
+        offers_file: The path to the file that contains the virtual machine offers
+        pruned: If it is True, the offers that are dominated by a cheaper one are left out
+
+    Returns:
+        offer_ids: A list with the position of every offer of 'vmOffers' in the offers file
+    """
+    data, offer_ids = get_dzn_data(problem_file, offers_file, pruned)
+    for name, value in data.items():
+        instance[name] = value
+    return offer_ids
+
+
+if __name__ == '__main__':
+    problem_name = input("Introduce the problem name(should start with uppercase letter):\n")
+    pruned = input("Leave out the offers that are dominated by a cheaper one? (yes/no)\n") == "yes"
+    offers_numbers = [20, 40, 250, 500]
+    suffix = "_Pruned" if pruned else ""
+
+    for offers_number in offers_numbers:
+        write_dzn(f"Input/Problem_Description/{problem_name}.json", f"Input/Offers/offers_{offers_number}.json",
+                  os.path.join(DZN_DIRECTORY, f"{problem_name}_Offers{offers_number}{suffix}.dzn"), pruned)
@@ -0,0 +1,230 @@
+import json
+import random
+from pathlib import Path
+
+from dzn import write_dzn
+
+"""
+This file is used to generate synthetic workloads, much bigger than the Wordpress application.
+It writes a problem description in the same format as Wordpress.json, with any number of components and random
+restrictions, offers files in the same format as offers_N.json and the matching DZN files for the MiniZinc models.
+The same seed always gives the same files, so the greedy algorithms and the MiniZinc models can be compared on them.
+"""
+
+# The hardware configurations from which the components and the offers are chosen
+CPU_VALUES = [1, 2, 4, 8, 16, 32, 64]
+MEMORY_PER_CPU = [1000, 1900, 3750, 4000, 7500, 8000, 15250]
+STORAGE_VALUES = [500, 1000, 2000, 4000, 8000, 16000, 24000]
+
+# The restriction types that are generated and how often each of them appears
+RESTRICTION_WEIGHTS = {
+    "Conflicts": 6,
+    "Provide": 2,
+    "Require_Provide": 2,
+    "Lower_Bound": 2,
+    "Upper_Bound": 1,
+    "Exclusive_Deployment": 1,
+    "Collocation": 1,
+    "Full_Deployment": 1
+}
+
+
+def generate_components(components_number, generator):
+    """
+    Builds the list of components of a synthetic application, in the format of the problem description files
+
+    Args:
+        components_number: The number of components of the application
+        generator: The random.Random instance used to choose the requirements
+
+    Returns:
+        components: A list of dictionaries, each of them describing a component and its requirements
+    """
+    components = []
+    for component_id in range(components_number):
+        cpu = generator.choice(CPU_VALUES[:4])
+        components.append({
+            "id": component_id,
+            "name": f"Component{component_id}",
+            "Compute": {"CPU": cpu, "GPU": "false", "Memory": cpu * generator.choice(MEMORY_PER_CPU[:4])},
+            "Storage": {"StorageType": "HDD", "StorageSize": generator.choice(STORAGE_VALUES[:3])},
+            "Network": {},
+            "keywords": [],
+            "operatingSystem": "Linux",
+            "preferences": {}
+        })
+    return components
+
+
+def generate_restrictions(components_number, restrictions_number, generator):
+    """
+    Builds a list of random restrictions between the components of a synthetic application
+    The restrictions are chosen so that they don't contradict each other directly: two components in conflict are
+    never collocated, a component never has both an upper bound and something that needs more instances of it,
+    and the components of an exclusive deployment are not used by any other restriction.
+
+    Args:
+        components_number: The number of components of the application, it must be at least 4
+        restrictions_number: The number of restrictions that are generated
+        generator: The random.Random instance used to choose the restrictions
+
+    Returns:
+        restrictions: A list of dictionaries, each of them describing a restriction
+    """
+    components = list(range(components_number))
+    # The components of the exclusive deployments are taken out before choosing the other restrictions
+    exclusive_number = min(restrictions_number * RESTRICTION_WEIGHTS["Exclusive_Deployment"]
+                           // sum(RESTRICTION_WEIGHTS.values()), components_number // 4)
+    exclusive_components = generator.sample(components, 2 * exclusive_number)
+    restrictions = [
+        {"type": "Exclusive_Deployment", "alphaCompId": exclusive_components[2 * index],
+         "betaCompId": exclusive_components[2 * index + 1]}
+        for index in range(exclusive_number)
+    ]
+    available = [component for component in components if component not in exclusive_components]
+
+    conflicts = set()
+    collocated = set()
+    upper_bounded = set()
+    lower_bounded = set()
+    required = set()
+    full_deployed = set()
+    types = [restriction_type for restriction_type in RESTRICTION_WEIGHTS if restriction_type != "Exclusive_Deployment"]
+    weights = [RESTRICTION_WEIGHTS[restriction_type] for restriction_type in types]
+
+    attempts = 0
+    while len(restrictions) < restrictions_number and attempts < 100 * restrictions_number:
+        attempts += 1
+        restriction_type = generator.choices(types, weights)[0]
+        alpha, beta = generator.sample(available, 2)
+        pair = (min(alpha, beta), max(alpha, beta))
+
+        if restriction_type == "Conflicts":
+            others = [component for component in generator.sample(available, min(4, len(available)))
+                      if component != alpha and (min(alpha, component), max(alpha, component)) not in collocated]
+            if not others:
+                continue
+            conflicts.update((min(alpha, component), max(alpha, component)) for component in others)
+            restrictions.append({"type": "Conflicts", "alphaCompId": alpha, "compsIdList": sorted(others)})
+        elif restriction_type == "Collocation":
+            if pair in conflicts or pair in collocated:
+                continue
+            collocated.add(pair)
+            restrictions.append({"type": "Collocation", "alphaCompId": alpha, "betaCompId": beta})
+        elif restriction_type in ("Provide", "Require_Provide"):
+            # The provider must be able to get as many instances as needed
+            if alpha in upper_bounded or alpha in required:
+                continue
+            required.add(alpha)
+            restriction = {"type": restriction_type, "alphaCompId": alpha, "betaCompId": beta,
+                           "alphaCompIdInstances": generator.randint(1, 4)}
+            if restriction_type == "Require_Provide":
+                restriction["betaCompIdInstances"] = generator.randint(1, 4)
+            restrictions.append(restriction)
+        elif restriction_type == "Lower_Bound":
+            if alpha in lower_bounded or alpha in upper_bounded:
+                continue
+            lower_bounded.add(alpha)
+            restrictions.append({"type": "Lower_Bound", "compsIdList": [alpha], "bound": generator.randint(1, 3)})
+        elif restriction_type == "Upper_Bound":
+            if alpha in lower_bounded or alpha in upper_bounded or alpha in required or alpha in full_deployed:
+                continue
+            upper_bounded.add(alpha)
+            restrictions.append({"type": "Upper_Bound", "compsIdList": [alpha], "bound": generator.randint(1, 3)})
+        elif restriction_type == "Full_Deployment":
+            if alpha in upper_bounded or alpha in full_deployed:
+                continue
+            full_deployed.add(alpha)
+            restrictions.append({"type": "Full_Deployment", "alphaCompId": alpha})
+    return restrictions
+
+
+def generate_problem(problem_name, components_number, restrictions_number, seed):
+    """
+    Builds a synthetic problem description, in the same format as Wordpress.json
+
+    Args:
+        problem_name: The name of the application
+        components_number: The number of components of the application, it must be at least 4
+        restrictions_number: The number of restrictions between the components
+        seed: The seed of the random number generator
+
+    Returns:
+        problem: A dictionary with the components and the restrictions of the application
+    """
+    generator = random.Random(seed)
+    return {
+        "application": problem_name,
+        "comment-general": f"Synthetic application with {components_number} components, generated with seed {seed}",
+        "components": generate_components(components_number, generator),
+        "IP": {"publicIPs": 1, "IPType": "IP4"},
+        "restrictions": generate_restrictions(components_number, restrictions_number, generator)
+    }
+
+
+def generate_offers(offers_number, seed):
+    """
+    Builds a synthetic offers dictionary, in the same format as the offers_N.json files
+    The key of an offer describes it in the same way as in those files (cpu, memory, storage, os and price)
+
+    Args:
+        offers_number: The number of virtual machine offers
+        seed: The seed of the random number generator
+
+    Returns:
+        offers: A dictionary that maps the name of every offer to its hardware resources and price
+    """
+    generator = random.Random(seed)
+    offers = {}
+    while len(offers) < offers_number:
+        cpu = generator.choice(CPU_VALUES)
+        memory = cpu * generator.choice(MEMORY_PER_CPU)
+        storage = generator.choice(STORAGE_VALUES)
+        # Bigger machines cost more, with some noise so that some offers are better than others
+        price = int(cpu * generator.uniform(20, 250) + memory * generator.uniform(0.001, 0.01)
+                    + storage * generator.uniform(0.01, 0.05)) + 1
+        name = f"c{cpu}.0m{memory / 1000}s{storage / 1000}osLinuxp{price / 1000:.10f}"
+        if name not in offers:
+            offers[name] = {"cpu": cpu, "memory": memory, "storage": storage, "operatingSystem": "Linux",
+                            "price": price}
+    return offers
+
+
+def write_workload(directory, problem_name, components_number, restrictions_number, offers_numbers, seed):
+    """
+    Writes the files of a synthetic workload, with the same layout as the Input directory:
+    Problem_Description/<problem_name>.json, Offers/offers_<n>.json and DZN_Files/<problem_name>_Offers<n>.dzn
+
+    Args:
+        directory: The directory where the files are written, it should not be Input, so the real offers are kept
+        problem_name: The name of the application
+        components_number: The number of components of the application
+        restrictions_number: The number of restrictions between the components
+        offers_numbers: A list with the numbers of offers, an offers file and a DZN file is written for each of them
+        seed: The seed of the random number generator, every file gets its own seed derived from it
+    """
+    directory = Path(directory)
+    for subdirectory in ("Problem_Description", "Offers", "DZN_Files"):
+        (directory / subdirectory).mkdir(parents=True, exist_ok=True)
+
+    problem_file = directory / "Problem_Description" / f"{problem_name}.json"
+    problem = generate_problem(problem_name, components_number, restrictions_number, seed)
+    with open(problem_file, 'w') as f:
+        json.dump(problem, f, indent=2)
+
+    for offers_number in offers_numbers:
+        offers_file = directory / "Offers" / f"offers_{offers_number}.json"
+        offers = generate_offers(offers_number, seed * 1000003 + offers_number)
+        with open(offers_file, 'w') as f:
+            json.dump(offers, f, indent=2)
+        write_dzn(problem_file, offers_file, directory / "DZN_Files" / f"{problem_name}_Offers{offers_number}.dzn")
+
+
+if __name__ == '__main__':
+    problem_name = input("Introduce the name of the synthetic problem:\n")
+    components_number = int(input("Introduce the number of components:\n"))
+    restrictions_number = int(input("Introduce the number of restrictions:\n"))
+    seed = int(input("Introduce the seed:\n"))
+    offers_numbers = [20, 40, 250, 500, 5000]
+
+    write_workload("Input/Synthetic", problem_name, components_number, restrictions_number, offers_numbers, seed)
@@ -0,0 +1,272 @@
+import itertools
+import json
+import math
+
+import numpy as np
+
+"""
+This file computes lower bounds for a problem without solving it exactly, in Python.
+The first ones are about the number of instances of the components: when the problem has only restrictions on the
+number of instances (like Wordpress), the surrogate problem is solved directly, without MiniZinc.
+The last one is about the price: no deployment with a given number of instances of the main component can be
+cheaper than it, so the quality of a greedy solution can be measured without the optimal price (the optimality gap).
+"""
+
+# The restrictions that can be handled without MiniZinc, Conflicts don't change the number of instances
+SIMPLE_RESTRICTIONS = {"Provide", "Require_Provide", "Lower_Bound", "Upper_Bound", "Equal_Bound",
+                       "Exclusive_Deployment", "Conflicts"}
+
+# If the number of instances of a component goes over this value, the restrictions can never be fulfilled
+MAX_INSTANCES = 1000000
+
+
+def is_simple_problem(restrictions):
+    """
+    This function checks if the surrogate problem can be solved without MiniZinc, for the given restrictions
+
+    Args:
+      restrictions: The list of restrictions from the problem description
+
+    Returns:
+       response: Boolean value that is True if all the restrictions are about the number of instances
+    """
+    return all(restriction['type'] in SIMPLE_RESTRICTIONS for restriction in restrictions)
+
+
+def get_choice_instances(components_number, restrictions, component_id, problem_instances_number):
+    """
+    For every choice of the deployed component of each exclusive deployment, the lower bounds of the components are
+    increased until every restriction is fulfilled. Since the restrictions only ask for more instances, this gives
+    the smallest solution for that choice, and every solution of the problem with that choice has at least as many
+    instances of each component.
+
+    Args:
+      components_number: The number of components of the problem
+      restrictions: The list of restrictions from the problem description, is_simple_problem must be True for them
+      component_id: The id of the main component
+      problem_instances_number: The minimum number of main component that will be deployed
+
+    Yields:
+       instances: A list with the number of instances of every component, for every choice that has a solution
+    """
+    exclusive_pairs = [(restriction['alphaCompId'], restriction['betaCompId']) for restriction in restrictions
+                       if restriction['type'] == "Exclusive_Deployment"]
+    exclusive_components = {component for pair in exclusive_pairs for component in pair}
+
+    for choice in itertools.product((0, 1), repeat=len(exclusive_pairs)):
+        # Every component that is not in an exclusive deployment is deployed at least once
+        lower = [0 if component in exclusive_components else 1 for component in range(components_number)]
+        upper = [MAX_INSTANCES] * components_number
+        lower[component_id] = max(lower[component_id], problem_instances_number)
+        # Exactly one of the components of an exclusive deployment is deployed
+        for pair, deployed in zip(exclusive_pairs, choice):
+            lower[pair[deployed]] = max(lower[pair[deployed]], 1)
+            upper[pair[1 - deployed]] = 0
+        for restriction in restrictions:
+            if restriction['type'] in ("Lower_Bound", "Equal_Bound"):
+                for component in restriction['compsIdList']:
+                    lower[component] = max(lower[component], restriction['bound'])
+            if restriction['type'] in ("Upper_Bound", "Equal_Bound"):
+                for component in restriction['compsIdList']:
+                    upper[component] = min(upper[component], restriction['bound'])
+
+        changed = True
+        while changed and all(lower[component] <= upper[component] for component in range(components_number)):
+            changed = False
+            for restriction in restrictions:
+                alpha = restriction.get('alphaCompId')
+                beta = restriction.get('betaCompId')
+                if restriction['type'] == "Require_Provide":
+                    needed = -(-lower[alpha] * restriction['alphaCompIdInstances']
+                               // restriction['betaCompIdInstances'])
+                # A provide restriction only matters when the providing component is deployed
+                elif restriction['type'] == "Provide" and upper[beta] > 0:
+                    needed = -(-lower[alpha] // restriction['alphaCompIdInstances'])
+                else:
+                    continue
+                if needed > lower[beta]:
+                    lower[beta] = needed
+                    changed = True
+
+        if all(lower[component] <= upper[component] for component in range(components_number)):
+            yield lower
+
+
+def get_minimum_instances(components_number, restrictions, component_id, problem_instances_number):
+    """
+    This function solves the surrogate problem directly: it finds the minimum number of instances of every component
+    when at least 'problem_instances_number' instances of the main component are deployed.
+    The smallest solution of every choice of the exclusive deployments is found with get_choice_instances, and the
+    best choice is kept.
+
+    Args:
+      components_number: The number of components of the problem
+      restrictions: The list of restrictions from the problem description, is_simple_problem must be True for them
+      component_id: The id of the main component
+      problem_instances_number: The minimum number of main component that will be deployed
+
+    Returns:
+       instances: A list with the number of instances of every component, or None if there is no solution
+    """
+    best_instances = None
+    for instances in get_choice_instances(components_number, restrictions, component_id, problem_instances_number):
+        if best_instances is None or sum(instances) < sum(best_instances):
+            best_instances = instances
+    return best_instances
+
+
+def get_instance_lower_bounds(problem_file, component_id, problem_instances_number):
+    """
+    This function finds a lower bound for the number of instances of every component, valid for every solution of
+    the problem (not only for the smallest one), so it can be added to the exact model as a redundant constraint.
+    It is the smallest number of instances of the component over all the choices of the exclusive deployments.
+    If the surrogate problem can't be solved in Python, only the main component is bounded.
+
+    Args:
+      problem_file: The path to the file that contains the problem description
+      component_id: The id of the main component
+      problem_instances_number: The minimum number of main component that will be deployed
+
+    Returns:
+       bounds: A list with the minimum number of instances of every component
+    """
+    with open(problem_file) as f:
+        problem = json.load(f)
+    components_number = len(problem['components'])
+    bounds = [0] * components_number
+    bounds[component_id] = problem_instances_number
+    if not is_simple_problem(problem['restrictions']):
+        return bounds
+    choices = list(get_choice_instances(components_number, problem['restrictions'], component_id,
+                                        problem_instances_number))
+    if not choices:
+        return bounds
+    return [min(instances) for instances in zip(*choices)]
+
+
+def get_conflict_cliques(components_number, restrictions):
+    """
+    Finds the maximal groups of components that are all in conflict with each other (the maximal cliques of the
+    conflict graph, with the Bron-Kerbosch algorithm). A component without conflicts is a group by itself.
+
+    Args:
+      components_number: The number of components of the problem
+      restrictions: The list of restrictions from the problem description
+
+    Returns:
+       cliques: A list with the sets of components of every group
+    """
+    conflicts = {component: set() for component in range(components_number)}
+    for restriction in restrictions:
+        if restriction['type'] == "Conflicts":
+            for component in restriction['compsIdList']:
+                if component != restriction['alphaCompId']:
+                    conflicts[restriction['alphaCompId']].add(component)
+                    conflicts[component].add(restriction['alphaCompId'])
+
+    cliques = []
+
+    def expand(clique, candidates, excluded):
+        if not candidates and not excluded:
+            cliques.append(clique)
+            return
+        pivot = max(candidates | excluded, key=lambda component: len(conflicts[component] & candidates))
+        for component in list(candidates - conflicts[pivot]):
+            expand(clique | {component}, candidates & conflicts[component], excluded & conflicts[component])
+            candidates = candidates - {component}
+            excluded = excluded | {component}
+
+    expand(set(), set(conflicts), set())
+    return cliques
+
+
+class PriceLowerBound:
+    """
+    A lower bound for the price of any deployment of a problem with an offers catalog, for a given number of
+    instances of the main component. It is the largest of two bounds, for every choice of the exclusive deployments
+    (the smallest of them over all the choices is kept):
+     - every instance of a component needs its own machine (a component is deployed at most once on a machine), and
+       the components of a conflict group can't share machines either, so the instances of a group need as many
+       machines, each of them at least as expensive as the cheapest offer that fits its component
+     - every resource (cpu, memory, storage) needed by all the instances must be bought, and no offer sells it for
+       less than the lowest price per unit of all the offers
+    The number of instances of every component is the smallest one allowed by the restrictions (see
+    get_choice_instances), so the bound is valid for every solution, not only for the greedy ones.
+    """
+
+    def __init__(self, problem_file, components_list, offers_list, component_id=0):
+        """
+        Args:
+            problem_file: The path to the file that contains the problem description
+            components_list: The list of components and their hardware requirements, as returned by get_components
+            offers_list: The OfferCatalog with the virtual machine offers
+            component_id: The id of the main component
+        """
+        with open(problem_file) as f:
+            self.restrictions = json.load(f)['restrictions']
+        self.components_number = len(components_list)
+        self.component_id = component_id
+        self.cliques = get_conflict_cliques(self.components_number, self.restrictions)
+        # The price of the cheapest offer that fits every component, infinite if there is none
+        self.component_prices = []
+        for component in components_list:
+            offer_id = offers_list.cheapest_fit(component)
+            self.component_prices.append(offers_list[offer_id]['Price'] if offer_id >= 0 else math.inf)
+        self.requirements = np.array([[component[resource] for resource in offers_list.resources]
+                                      for component in components_list], dtype=np.float64)
+        # The lowest price of a unit of every resource, over all the offers
+        capacities = np.array([[offer[resource] for resource in offers_list.resources] for offer in offers_list],
+                              dtype=np.float64)
+        prices = np.array([offer['Price'] for offer in offers_list], dtype=np.float64)
+        with np.errstate(divide='ignore'):
+            self.unit_prices = np.min(prices[:, None] / capacities, axis=0)
+        self.cache = {}
+
+    def get_choice_bound(self, instances):
+        """
+        Args:
+            instances: A list with the number of instances of every component
+
+        Returns:
+            bound: The lower bound of the price of a deployment with at least these numbers of instances
+        """
+        clique_bound = max(sum(instances[component] * self.component_prices[component] for component in clique
+                               if instances[component] > 0) for clique in self.cliques)
+        resource_bound = float(np.max(np.asarray(instances, dtype=np.float64) @ self.requirements * self.unit_prices))
+        return max(clique_bound, resource_bound)
+
+    def get_lower_bound(self, problem_instances_number):
+        """
+        Args:
+            problem_instances_number: The minimum number of main component instances that are deployed
+
+        Returns:
+            bound: The lower bound of the price of a deployment, or None if the restrictions can't be fulfilled
+                   or some component doesn't fit on any offer
+        """
+        if problem_instances_number not in self.cache:
+            if is_simple_problem(self.restrictions):
+                choices = list(get_choice_instances(self.components_number, self.restrictions, self.component_id,
+                                                    problem_instances_number))
+            else:
+                choices = [[problem_instances_number if component == self.component_id else 0
+                            for component in range(self.components_number)]]
+            bounds = [self.get_choice_bound(instances) for instances in choices]
+            bound = min(bounds) if bounds else math.inf
+            self.cache[problem_instances_number] = math.ceil(bound) if bound < math.inf else None
+        return self.cache[problem_instances_number]
+
+
+def get_optimality_gap(price, lower_bound):
+    """
+    Args:
+        price: The price of a solution
+        lower_bound: A lower bound of the optimal price, as returned by PriceLowerBound.get_lower_bound
+
+    Returns:
+        gap: The largest fraction of the price that could be saved with the optimal solution, or None if there is
+             no lower bound
+    """
+    if lower_bound is None or price <= 0:
+        return None
+    return max(price - lower_bound, 0) / price
@@ -1,9 +1,18 @@
 import csv
+import itertools
 import json
 import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from copy import deepcopy
 from pathlib import Path
 
+import numpy as np
+
+import profiler
+from assignment_matrix import AssignmentMatrix
+from lower_bound import PriceLowerBound, get_optimality_gap
+from offer_catalog import OfferCatalog, load_offers
+
 """
 This file is used to load an input obtained with MiniZinc.
 Our goal is to increase the number of instances of a given component by at least 1 for the given input. 
@@ -57,6 +66,7 @@ def get_constraints(file):
 def get_offers(file):
     """
     Extracts from the parameter file a list with the virtual machine offers and their hardware requirements
+    The file is read by load_offers, one offer at a time, and its offers are kept in a binary cache for the next runs
 
     Args:
        file: The file location
@@ -65,18 +75,12 @@ def get_offers(file):
         offers_list: A list of dictionaries, where each dictionary represents a virtual machine offer and it's hardware
          requirements like: cpu, memory and storage
     """
-    with open(file) as f:
-        offers_list = []
-        json_list = json.load(f)
-        for entry in json_list:
-            offer = {
-                'Cpu': json_list[entry]['cpu'],
-                'Memory': json_list[entry]['memory'],
-                'Storage': json_list[entry]['storage'],
-                'Price': json_list[entry]['price']
-            }
-            offers_list.append(offer)
-        return offers_list
+    offers = load_offers(file)
+    columns = [offers[name].tolist() for name in ('Cpu', 'Memory', 'Storage', 'Price')]
+    return [
+        {'Cpu': cpu, 'Memory': memory, 'Storage': storage, 'Price': price}
+        for cpu, memory, storage, price in zip(*columns)
+    ]
 
 
 def parse_existing_solution(file):
@@ -109,7 +113,7 @@ def compute_frequency(component_id, matrix):
        component_frequency: an integer representing the number of times that the component with id 'component_id' was
        deployed in the application
     """
-    component_frequency = sum(matrix[component_id])
+    component_frequency = matrix.frequency(component_id)
     return component_frequency
 
 
@@ -128,16 +132,11 @@ def check_conflicts(constraint, matrix, component_id, constraints_list):
         response: boolean value that takes value True when the constraint is fulfilled or False otherwise
     """
     conflict_component_id = constraint['alphaCompId']
-    for column in range(len(matrix[0])):
-        conflict_component_deployed = False
-        component_id_deployed = False
-        for row in range(len(matrix)):
-            if matrix[row][column] == 1 and row == conflict_component_id:
-                conflict_component_deployed = True
-            elif matrix[row][column] == 1 and row == component_id:
-                component_id_deployed = True
-        if component_id_deployed is True and conflict_component_deployed is True:
-            return False
+    # A component is never in conflict with itself
+    if conflict_component_id == component_id:
+        return True
+    if matrix.deployed_together(conflict_component_id, component_id):
+        return False
     return True
 
 
@@ -275,9 +274,8 @@ def check_collocation(constraint, matrix, component_id, constraints_list):
     Returns:
         response: boolean value that takes value True when the constraint is fulfilled or False otherwise
     """
-    for column in range(len(matrix[0])):
-        if matrix[constraint['alphaCompId']][column] != matrix[constraint['betaCompId']][column]:
-            return False
+    if not matrix.same_placement(constraint['alphaCompId'], constraint['betaCompId']):
+        return False
     return True
 
 
@@ -296,7 +294,7 @@ def check_full_deployment(constraint, matrix, component_id, constraints_list):
          response: boolean value that takes value True when the constraint is fulfilled or False otherwise
     """
     conflicts = get_component_conflicts(constraint['alphaCompId'], constraints_list)
-    for column in range(len(matrix[0])):
+    for column in range(matrix.columns):
         deployed_components = get_deployed_components(matrix, column)
         # We create a list with the elements that are deployed but are in conflict with the component
         components_in_conflict = [
@@ -305,7 +303,7 @@ def check_full_deployment(constraint, matrix, component_id, constraints_list):
         ]
         # If on any machine the component is not deployed, but there is no conflict to stop that, we return false
         # The list being empty means that the component could actually be deployed on that machine
-        if matrix[constraint['alphaCompId']][column] == 0 and components_in_conflict is None:
+        if matrix[constraint['alphaCompId'], column] == 0 and components_in_conflict is None:
             return False
     return True
 
@@ -330,12 +328,12 @@ def handle_collocation(constraint, new_matrix, types, component_id, components_l
        Returns:
             new_matrix: The new assignment matrix, updated after trying to fix the false constraint
        """
-    for column in range(len(initial_matrix[0]), len(new_matrix[0])):
+    for column in range(initial_matrix.columns, new_matrix.columns):
         deployed_components = get_deployed_components(new_matrix, column)
         if constraint['alphaCompId'] in deployed_components and constraint['betaCompId'] not in deployed_components:
-            new_matrix[constraint['betaCompId']][column] = 1
+            new_matrix[constraint['betaCompId'], column] = 1
         elif constraint['betaCompId'] in deployed_components and constraint['alphaCompId'] not in deployed_components:
-            new_matrix[constraint['alphaCompId']][column] = 1
+            new_matrix[constraint['alphaCompId'], column] = 1
     return new_matrix
 
 
@@ -360,11 +358,11 @@ def handle_full_deployment(constraint, new_matrix, types, component_id, componen
             new_matrix: The new assignment matrix, updated after trying to fix the false constraint
     """
     conflict_components = get_component_conflicts(constraint['alphaCompId'], constraints_list)
-    for column in range(len(initial_matrix[0]), len(new_matrix[0])):
+    for column in range(initial_matrix.columns, new_matrix.columns):
         deployed_components = get_deployed_components(new_matrix, column)
         deployed_but_conflict = [component for component in deployed_components if component in conflict_components]
         if constraint['alphaCompId'] not in deployed_components and deployed_but_conflict is None:
-            new_matrix[constraint['alphaCompId']][column] = 1
+            new_matrix[constraint['alphaCompId'], column] = 1
     return new_matrix
 
 
@@ -394,7 +392,7 @@ def handle_provide(constraint, new_matrix, types, component_id, components_list,
     # To know which component we will have to add, we must identify the problem component
     # We go from the last column of the assignment matrix and check each column
     # If we find any of the components involved in the constraint, we found the component that caused the inequality
-    for column in reversed(range(len(initial_matrix[0]), len(new_matrix[0]))):
+    for column in reversed(range(initial_matrix.columns, new_matrix.columns)):
         deployed_components = get_deployed_components(new_matrix, column)
         if constraint['alphaCompId'] in deployed_components:
             # We have to add instances of this component since the alphaCompId was deployed and messed the constraint
@@ -413,24 +411,25 @@ def handle_provide(constraint, new_matrix, types, component_id, components_list,
         # In case we can place the component on previous machines, we just update the assignment matrix accordingly
         # We don't have to check anything else, because we don't rent a new machine
         if new_component_column >= 0:
-            new_matrix[problem_component_id][new_component_column] = 1
+            new_matrix[problem_component_id, new_component_column] = 1
             return new_matrix
 
     if check_new_columns == "Yes":
         # With new columns we want to see if we work with the original matrix, or with a matrix with new
         # machines/columns
-        new_columns = len(new_matrix[0]) - len(initial_matrix[0])
+        new_columns = new_matrix.columns - initial_matrix.columns
         # In case there are new machines, we don't actually know yet what kind of machine they are At this step,
         # we have to check on the new machines if we can place the new component, regarding the constraints
         if new_columns > 0:
-            for column in range(len(initial_matrix[0]), len(new_matrix[0])):
+            for column in range(initial_matrix.columns, new_matrix.columns):
                 if check_column_placement(new_matrix, column, problem_component_id, constraints_list):
-                    new_matrix[problem_component_id][column] = 1
+                    new_matrix[problem_component_id, column] = 1
                     return new_matrix
 
     # If we can't place the component on what we already have, we have to get a new machine and update the matrix
-    matrix = add_column(new_matrix, problem_component_id)
-    return matrix
+    # The previous matrix is not used anymore, so the column is added in place
+    new_matrix.append_column(problem_component_id)
+    return new_matrix
 
 
 def handle_require_provide(constraint, new_matrix, types, component_id, components_list,
@@ -458,7 +457,7 @@ def handle_require_provide(constraint, new_matrix, types, component_id, componen
     # To know which component we will have to add, we must identify the problem component
     # We go from the last column of the assignment matrix and check each column
     # If we find any of the components involved in the constraint, we found the component that caused the inequality
-    for column in reversed(range(len(initial_matrix[0]), len(new_matrix[0]))):
+    for column in reversed(range(initial_matrix.columns, new_matrix.columns)):
         deployed_components = get_deployed_components(new_matrix, column)
         if constraint['alphaCompId'] in deployed_components:
             # We have to add instances of this component since the alphaCompId was deployed and messed the constraint
@@ -477,23 +476,24 @@ def handle_require_provide(constraint, new_matrix, types, component_id, componen
     # In case we can place the component on previous machines, we just update the assignment matrix accordingly
     # We don't have to check anything else, because we don't rent a new machine
     if new_component_column >= 0:
-        new_matrix[problem_component_id][new_component_column] = 1
+        new_matrix[problem_component_id, new_component_column] = 1
         return new_matrix
 
     if check_new_columns == "Yes":
         # With new columns we want to see if we work with the original matrix,or with a matrix with new machines/columns
-        new_columns = len(new_matrix[0]) - len(initial_matrix[0])
+        new_columns = new_matrix.columns - initial_matrix.columns
         # In case there are new machines, we don't actually know yet what kind of machine they are
         # At this step,we have to check on the new machines if we can place the new component, regarding the constraints
         if new_columns > 0:
-            for column in range(len(initial_matrix[0]), len(new_matrix[0])):
+            for column in range(initial_matrix.columns, new_matrix.columns):
                 if check_column_placement(new_matrix, column, problem_component_id, constraints_list):
-                    new_matrix[problem_component_id][column] = 1
+                    new_matrix[problem_component_id, column] = 1
                     return new_matrix
 
     # If we can't place the component on what we already have, we have to get a new machine and update the matrix
-    matrix = add_column(new_matrix, problem_component_id)
-    return matrix
+    # The previous matrix is not used anymore, so the column is added in place
+    new_matrix.append_column(problem_component_id)
+    return new_matrix
 
 
 def handle_upper_bound(constraint, new_matrix, types, component_id, components_list,
@@ -584,20 +584,10 @@ def get_component_conflicts(component_id, constraints_list):
        Returns:
           component_conflicts: list containing the id of the components that are in conflict with the given one
     """
-    conflicts = [constraint for constraint in constraints_list if constraint['type'] == 'Conflicts']
-    component_conflicts = []
-    for conflict in conflicts:
-        # A component id could be found in the 'alphaCompId' field
-        # It means our component has a list of components that conflict with it, that are found in 'compsIdList'
-        if conflict['alphaCompId'] == component_id:
-            for component in conflict['compsIdList']:
-                if component not in component_conflicts:
-                    component_conflicts.append(component)
-        # Also, we could find the given id in the conflict list of another component
-        # If that is the case, and that component's id is not in the conflict list already , we add it too
-        if component_id in conflict['compsIdList'] and conflict['alphaCompId'] not in component_conflicts:
-            component_conflicts.append(conflict['alphaCompId'])
-    return component_conflicts
+    # The conflicts of every component are computed once, when the constraints are compiled
+    if not isinstance(constraints_list, ConstraintList):
+        constraints_list = compile_constraints(constraints_list)
+    return constraints_list.component_conflicts.get(component_id, [])
 
 
 def check_column_placement(matrix, column_id, component_id, constraints_list):
@@ -616,11 +606,11 @@ def check_column_placement(matrix, column_id, component_id, constraints_list):
                 takes value False otherwise
     """
 
-    if matrix[component_id][column_id] == 1:
+    if matrix[component_id, column_id] == 1:
         return False
     component_conflicts = get_component_conflicts(component_id, constraints_list)
-    for row in range(len(matrix)):
-        if matrix[row][column_id] == 1 and row in component_conflicts:
+    for row in get_deployed_components(matrix, column_id):
+        if row in component_conflicts:
             return False
     return True
 
@@ -636,11 +626,7 @@ def get_deployed_components(matrix, column_id):
     Returns:
         deployed_components: List that contains the id/id's of the component/s deployed on the machine with given id
     """
-    deployed_components = []
-    # By looping from 0 to len(matrix) we will check every component
-    for row in range(len(matrix)):
-        if matrix[row][column_id] == 1:
-            deployed_components.append(row)
+    deployed_components = matrix.deployed_components(column_id)
     return deployed_components
 
 
@@ -659,6 +645,10 @@ def get_free_space(machine_id, matrix, column_id, offers_list, components_list):
        free_space: List that contains the free space left on a machine, after subtracting from the total machine
                    capacity, the amount occupied by the already deployed component/s on it
     """
+    # If the matrix keeps the free space of this machine, we don't have to compute it again
+    if matrix.tracked_types is not None and column_id < len(matrix.tracked_types) \
+            and matrix.tracked_types[column_id] == machine_id:
+        return matrix.free_space(column_id).tolist()
     # We need to see first if there is anything deployed on the machine
     deployed_components = get_deployed_components(matrix, column_id)
     if not deployed_components:
@@ -712,22 +702,138 @@ def get_component_constraints(component_id, constraints_list):
     Returns:
        component_constraints: List that contains all the constraints that involve the given component
     """
+    # The constraints of every component are computed once, when the constraints are compiled
+    if not isinstance(constraints_list, ConstraintList):
+        constraints_list = compile_constraints(constraints_list)
+    return constraints_list.component_constraints.get(component_id, [])
 
-    component_constraints = []
-    # The only keys that can contain a component id
-    id_keys = ['alphaCompId', 'betaCompId', 'compsIdList']
-    for constraint in constraints_list:
-        # Gets the corresponding keys for that specific constraint
-        constraint_keys = [value for value in constraint if value in id_keys]
-        for id_key in constraint_keys:
-            # Some of the keys can have lists as value so we have to check if they contain our component id
-            if type(constraint[id_key]) is list:
-                if component_id in constraint[id_key]:
-                    component_constraints.append(constraint)
-            else:
-                if component_id == constraint[id_key]:
-                    component_constraints.append(constraint)
-    return component_constraints
+
+# The functions that check and handle each type of constraint
+# A new type of constraint is supported by adding its functions to these tables
+CHECK_FUNCTIONS = {
+    'Conflicts': check_conflicts,
+    'Lower_Bound': check_lower_bound,
+    'Upper_Bound': check_upper_bound,
+    'Equal_Bound': check_equal_bound,
+    'Exclusive_Deployment': check_exclusive_deployment,
+    'Require_Provide': check_require_provide,
+    'Provide': check_provide,
+    'Collocation': check_collocation,
+    'Full_Deployment': check_full_deployment
+}
+
+HANDLE_FUNCTIONS = {
+    'Upper_Bound': handle_upper_bound,
+    'Equal_Bound': handle_equal_bound,
+    'Exclusive_Deployment': handle_exclusive_deployment,
+    'Require_Provide': handle_require_provide,
+    'Provide': handle_provide,
+    'Collocation': handle_collocation,
+    'Full_Deployment': handle_full_deployment
+}
+
+
+class Constraint(dict):
+    """
+    A constraint from the problem description, with its check and handle functions already resolved
+    It is still a dictionary, so its fields are accessed in the same way as the ones read from the json file
+    """
+
+    def __init__(self, description):
+        """
+        Args:
+            description: The dictionary that describes the constraint in the problem file
+        """
+        super().__init__(description)
+        if self['type'] not in CHECK_FUNCTIONS:
+            raise ValueError(f"Unknown constraint type {self['type']}.")
+        self.check_function = CHECK_FUNCTIONS[self['type']]
+        self.handle_function = HANDLE_FUNCTIONS.get(self['type'])
+        # The only keys that can contain a component id
+        self.component_ids = set()
+        for id_key in ['alphaCompId', 'betaCompId', 'compsIdList']:
+            if id_key in self:
+                if type(self[id_key]) is list:
+                    self.component_ids.update(self[id_key])
+                else:
+                    self.component_ids.add(self[id_key])
+
+    @profiler.profiled('check', key=lambda constraint, *args: constraint['type'])
+    def check(self, matrix, component_id, constraints_list):
+        """
+        Calls the check function of this constraint
+
+        Args:
+            matrix: The assignment matrix on which the constraint is going to be checked
+            component_id: The index of the assignment matrix row that corresponds to the involved component
+            constraints_list: The list with all the constraints that our problem must fulfill
+
+        Returns:
+            response: boolean value that takes value True when the constraint is fulfilled or False otherwise
+        """
+        return self.check_function(self, matrix, component_id, constraints_list)
+
+    @profiler.profiled('handle', key=lambda constraint, *args: constraint['type'])
+    def handle(self, new_matrix, types, component_id, components_list,
+               constraints_list, offers_list, initial_matrix, check_new_columns):
+        """
+        Calls the handle function of this constraint, the arguments are the ones of handle_false_constraints
+
+        Returns:
+            new_matrix: The new assignment matrix, or a message that explains why the constraint cannot be fixed
+        """
+        if self.handle_function is None:
+            raise ValueError(f"A broken constraint of type {self['type']} can not be fixed.")
+        return self.handle_function(self, new_matrix, types, component_id, components_list,
+                                    constraints_list, offers_list, initial_matrix, check_new_columns)
+
+
+class ConstraintList(list):
+    """
+    The list of compiled constraints of a problem
+    It also keeps, for every component, the constraints that involve it and the components that are in conflict with it
+    """
+
+    def __init__(self, constraints_list):
+        """
+        Args:
+            constraints_list: The list of constraints, as read from the problem file
+        """
+        super().__init__(
+            constraint if isinstance(constraint, Constraint) else Constraint(constraint)
+            for constraint in constraints_list
+        )
+        self.component_constraints = {}
+        self.component_conflicts = {}
+        for constraint in self:
+            for component_id in constraint.component_ids:
+                self.component_constraints.setdefault(component_id, []).append(constraint)
+
+            if constraint['type'] != 'Conflicts':
+                continue
+            # The component with id 'alphaCompId' is in conflict with every component from 'compsIdList'
+            alpha_conflicts = self.component_conflicts.setdefault(constraint['alphaCompId'], [])
+            for component_id in constraint['compsIdList']:
+                if component_id not in alpha_conflicts:
+                    alpha_conflicts.append(component_id)
+                # And the conflict also goes the other way around
+                component_conflicts = self.component_conflicts.setdefault(component_id, [])
+                if constraint['alphaCompId'] not in component_conflicts:
+                    component_conflicts.append(constraint['alphaCompId'])
+
+
+def compile_constraints(constraints_list):
+    """
+    Turns the constraints read from the problem file into Constraint objects
+    This is done once, before solving, so that the check and handle functions are not looked up on every call
+
+    Args:
+        constraints_list: The list of constraints, as read from the problem file
+
+    Returns:
+        constraints_list: A ConstraintList with the compiled constraints
+    """
+    return ConstraintList(constraints_list)
 
 
 def check_constraints(constraints_list, matrix, component_id):
@@ -743,19 +849,160 @@ def check_constraints(constraints_list, matrix, component_id):
     Returns:
         false_constraints: List that contains all the false constraints from the given constraint list
     """
+    if not isinstance(constraints_list, ConstraintList):
+        constraints_list = compile_constraints(constraints_list)
     false_constraints = []
     for constraint in constraints_list:
-        constraint_name = constraint['type']
-        # Calls the the corresponding function using the constraint's name
-        # The check functions all follow the convention: check_constraint_name
-        corresponding_function_result = eval(
-            f'check_{constraint_name}'.lower() + "(constraint, matrix, component_id, constraints_list)"
-        )
-        if not corresponding_function_result:
+        if not check_constraint(constraint, matrix, component_id, constraints_list):
             false_constraints.append(constraint)
     return false_constraints
 
 
+def check_constraint(constraint, matrix, component_id, constraints_list):
+    """
+    Calls the check function that corresponds to the type of the given constraint
+
+    Args:
+        constraint: The constraint instance that is going to be checked
+        matrix: The assignment matrix on which the constraint is going to be checked
+        component_id: The index of the assignment matrix row that corresponds to the involved component
+        constraints_list: List with all the constraints that must be fulfilled
+
+    Returns:
+        response: boolean value that takes value True when the constraint is fulfilled or False otherwise
+    """
+    return constraint.check(matrix, component_id, constraints_list)
+
+
+def get_constraint_rows(constraint, component_id, constraints_list):
+    """
+    Builds the set of assignment matrix rows that are read when the given constraint is checked
+    If none of these rows was modified, the result of the check can not change
+
+    Args:
+        constraint: The constraint instance that is going to be checked
+        component_id: The index of the assignment matrix row that corresponds to the involved component
+        constraints_list: List with all the constraints that must be fulfilled
+
+    Returns:
+        constraint_rows: Set that contains the ids of the components whose rows are used by the constraint
+    """
+    # A conflict is checked between its 'alphaCompId' and the component that we add (see check_conflicts)
+    if constraint['type'] == 'Conflicts':
+        return {constraint['alphaCompId'], component_id}
+    constraint_rows = set(constraint.component_ids)
+    # A full deployment also depends on the components that are in conflict with its component
+    if constraint['type'] == 'Full_Deployment':
+        constraint_rows.update(get_component_conflicts(constraint['alphaCompId'], constraints_list))
+    return constraint_rows
+
+
+class IncrementalChecker:
+    """
+    Checks all the constraints on an assignment matrix that is modified between two checks
+    The first check goes through every constraint, after that only the constraints that involve a row modified since
+    the previous check are verified again. The other ones keep their previous result.
+
+    For the constraints that are verified machine by machine (Conflicts and Collocation) we keep the set of machines
+    where they are broken, and we update it only for the modified columns.
+    The number of instances of each component is already kept up to date by the assignment matrix.
+    """
+
+    def __init__(self, constraints_list, component_id):
+        """
+        Args:
+            constraints_list: List with all the constraints that must be fulfilled
+            component_id: The index of the assignment matrix row that corresponds to the involved component
+        """
+        if not isinstance(constraints_list, ConstraintList):
+            constraints_list = compile_constraints(constraints_list)
+        self.constraints_list = constraints_list
+        self.component_id = component_id
+        self.constraints_rows = [
+            get_constraint_rows(constraint, component_id, constraints_list) for constraint in constraints_list
+        ]
+        # For every machine, the set of components deployed on it
+        self.deployed_components = None
+        # For every machine based constraint, the set of machines where it is broken
+        self.broken_columns = [set() for _ in constraints_list]
+        self.results = [True for _ in constraints_list]
+
+    def check(self, matrix, changes=None):
+        """
+        Checks the constraints on the given matrix and returns the false ones
+        The matrix must be the one received at the previous call, or a matrix built from it with add_column
+
+        Args:
+            matrix: The assignment matrix on which the constraints are going to be checked
+            changes: The cells modified since the previous check, by default they are popped from the matrix
+                     (when several checkers follow the same matrix they are popped once and given to each of them)
+
+        Returns:
+            false_constraints: List that contains all the false constraints, in the order of the constraints list
+        """
+        if changes is None:
+            changes = matrix.pop_changes()
+        if self.deployed_components is None:
+            # At the first check there is no previous result so everything has to be verified
+            self.deployed_components = [set(get_deployed_components(matrix, column))
+                                        for column in range(matrix.columns)]
+            modified_rows = None
+            modified_columns = set(range(matrix.columns))
+        else:
+            modified_rows = {row for row, column in changes}
+            modified_columns = {column for row, column in changes}
+            for column in range(len(self.deployed_components), matrix.columns):
+                self.deployed_components.append(set())
+                modified_columns.add(column)
+            for column in modified_columns:
+                self.deployed_components[column] = set(get_deployed_components(matrix, column))
+
+        for index, constraint in enumerate(self.constraints_list):
+            if modified_rows is not None and not self.constraints_rows[index] & modified_rows:
+                continue
+            self.results[index] = self.check_constraint(index, constraint, matrix, modified_columns)
+
+        return [
+            constraint for constraint, result in zip(self.constraints_list, self.results) if not result
+        ]
+
+    @profiler.profiled('incremental check', key=lambda checker, index, constraint, *args: constraint['type'])
+    def check_constraint(self, index, constraint, matrix, modified_columns):
+        """
+        Checks again a single constraint, updating the machines where it is broken if it is verified per machine
+
+        Args:
+            index: The position of the constraint in the constraints list
+            constraint: The constraint instance that is going to be checked
+            matrix: The assignment matrix on which the constraint is going to be checked
+            modified_columns: Set with the machines that were modified since the previous check
+
+        Returns:
+            response: boolean value that takes value True when the constraint is fulfilled or False otherwise
+        """
+        if constraint['type'] == 'Conflicts':
+            conflict_component_id = constraint['alphaCompId']
+            for column in modified_columns:
+                deployed_components = self.deployed_components[column]
+                if conflict_component_id != self.component_id and conflict_component_id in deployed_components \
+                        and self.component_id in deployed_components:
+                    self.broken_columns[index].add(column)
+                else:
+                    self.broken_columns[index].discard(column)
+            return not self.broken_columns[index]
+        if constraint['type'] == 'Collocation':
+            for column in modified_columns:
+                deployed_components = self.deployed_components[column]
+                if (constraint['alphaCompId'] in deployed_components) != \
+                        (constraint['betaCompId'] in deployed_components):
+                    self.broken_columns[index].add(column)
+                else:
+                    self.broken_columns[index].discard(column)
+            return not self.broken_columns[index]
+        # The other constraints only depend on the number of deployed instances, that the matrix keeps for us
+        return check_constraint(constraint, matrix, self.component_id, self.constraints_list)
+
+
 def add_column(matrix, component_id):
     """
     Builds a new matrix by adding a column to the one received as parameter
@@ -769,14 +1016,7 @@ def add_column(matrix, component_id):
         new_matrix: A new assignment matrix obtained by adding a new column to the given one, with the component
                     with given id deployed on it
     """
-    new_matrix = deepcopy(matrix)
-    row_counter = 0
-    for row in new_matrix:
-        if row_counter == component_id:
-            row.append(1)
-        else:
-            row.append(0)
-        row_counter += 1
+    new_matrix = matrix.add_column(component_id)
     return new_matrix
 
 
@@ -802,12 +1042,8 @@ def handle_false_constraints(false_constraints, new_matrix, types, component_id,
         new_matrix: The new assignment matrix, updated after trying to fix the false constraints
     """
     for constraint in false_constraints:
-        constraint_name = constraint['type']
-        # All handling functions follow the convention: handle_constraint_name
-        new_matrix = eval(
-            f'handle_{constraint_name}'.lower() + "(constraint, new_matrix, types, component_id, components_list,"
-                                                  "constraints_list, offers_list, initial_matrix, check_new_columns)"
-        )
+        new_matrix = constraint.handle(new_matrix, types, component_id, components_list,
+                                       constraints_list, offers_list, initial_matrix, check_new_columns)
         # We check after every handle function call if the false constraint can be fixed or not
         # In general the result should be a new matrix, after fixing a constraint
         # If the type of new matrix is string, it means the constraint can't be fixed and the result is an error message
@@ -836,8 +1072,12 @@ def get_final_matrix(new_matrix, types, component_id, components_list, component
     Returns:
         new_matrix: The new assignment matrix, updated after trying to fix the all the false constraints
     """
-    false_constraints = check_constraints(constraints_list, new_matrix, component_id)
+    # The handlers change only a few cells or add a column at a time, so after the first check
+    # we only verify again the constraints that involve the modified components
+    checker = IncrementalChecker(constraints_list, component_id)
+    false_constraints = checker.check(new_matrix)
     while false_constraints:
+        iteration_start = time.perf_counter() if profiler.ENABLED else None
         new_matrix = handle_false_constraints(
             false_constraints, new_matrix, types, component_id, components_list,
             constraints_list, offers_list, initial_matrix, check_new_columns
@@ -846,8 +1086,14 @@ def get_final_matrix(new_matrix, types, component_id, components_list, component
         # If all went ok, then matrix will be the expected way, but if we were not able to fix then it's type is str
         # It will contain the error message regarding what went wrong
         if type(new_matrix) == str:
+            # The failed iteration is also part of the report
+            if iteration_start is not None:
+                profiler.record_iteration(len(false_constraints), time.perf_counter() - iteration_start)
             return new_matrix
-        false_constraints = check_constraints(constraints_list, new_matrix, component_id)
+        false_constraints_number = len(false_constraints)
+        false_constraints = checker.check(new_matrix)
+        if iteration_start is not None:
+            profiler.record_iteration(false_constraints_number, time.perf_counter() - iteration_start)
     return new_matrix
 
 
@@ -865,17 +1111,14 @@ def get_new_resources(new_matrix, initial_matrix, components_list):
         new_components_resources: List that contains the hardware requirements of all the new components that have to
                                   to be added to our application
     """
-    new_components_resources = []
     resources_keys = [key for key in components_list[0] if key != 'Name']
-    # We check only the new machines
-    for column in range(len(initial_matrix[0]), len(new_matrix[0])):
-        deployed_components_id = get_deployed_components(new_matrix, column)
-        components_dict = [components_list[index] for index in deployed_components_id]
-        machine_resources = {resource: 0 for resource in resources_keys}
-        for component in components_dict:
-            for key in resources_keys:
-                machine_resources[key] = machine_resources[key] + component[key]
-        new_components_resources.append(machine_resources)
+    requirements = np.array([[component[key] for key in resources_keys] for component in components_list])
+    # We sum the requirements of the deployed components only on the new machines
+    machines_resources = new_matrix.column_resources(requirements, initial_matrix.columns)
+    new_components_resources = [
+        {key: int(value) for key, value in zip(resources_keys, machine_resources)}
+        for machine_resources in machines_resources
+    ]
     return new_components_resources
 
 
@@ -893,39 +1136,34 @@ def sort_offers(offers_list):
     return sorted_list
 
 
+@profiler.profiled('choose_machine')
 def choose_machine(offers_list, components_resources):
     """
     This function receives the list of offers and a list with the resources needed by the new components to be added
     It will return a list with the id of the chosen machines
 
     Args:
-       offers_list: The list that contains all the virtual machine offers, with their hardware requirements
+       offers_list: The OfferCatalog that contains all the virtual machine offers, with their hardware requirements
+                    A plain list of offers is also accepted, but then the catalog is built on every call
        components_resources: List that contains the hardware requirements of all the new components that have to
                              to be added to our application
 
     Returns:
        new machines: The id's of the machines that have been selected to deploy the new components on
     """
+    if not isinstance(offers_list, OfferCatalog):
+        offers_list = OfferCatalog(offers_list)
     new_machines = []
-    sorted_offers = deepcopy(offers_list)
-    # To choose a corresponding machine, we sort the list of offers in ascending order after price
-    sorted_offers = sort_offers(sorted_offers)
-
     for machine_resources in components_resources:
-        # We consider only the offers that satisfy the hardware requirements
-        matching_offers = [
-            offer for offer in sorted_offers
-            if offer['Cpu'] >= machine_resources['Cpu']
-            and offer['Memory'] >= machine_resources['Memory']
-            and offer['Storage'] >= machine_resources['Storage']
-        ]
-
-        # We take the first machine from the matching offers
-        # By doing this, we make sure that the hardware requirements are satisfied and we have the lowest price
-        new_machines.append(offers_list.index(matching_offers[0]))
+        # The catalog gives us the cheapest offer that satisfies the hardware requirements
+        machine_id = offers_list.cheapest_fit(machine_resources)
+        if machine_id < 0:
+            raise ValueError(f"There is no virtual machine offer with enough resources for {machine_resources}.")
+        new_machines.append(machine_id)
     return new_machines
 
 
+@profiler.profiled('check_existing_machines')
 def check_existing_machines(matrix, types, component_id, components_list, constraints_list, offers_list):
     """
     A function that will verify if we can place the component with parameter id anywhere on the matrix received
@@ -943,18 +1181,50 @@ def check_existing_machines(matrix, types, component_id, components_list, constr
        column: Integer value that represents the already deployed column/machine on which we can place a new component.
                If there is no such column, it takes value -1
     """
-    for column in range(len(matrix[component_id])):
+    if not isinstance(constraints_list, ConstraintList):
+        constraints_list = compile_constraints(constraints_list)
+    # Placing the component changes only its row, so the constraints that don't use that row are checked only once
+    # If any of them is false, there is no machine where we can place the component
+    placement_constraints = []
+    for constraint in constraints_list:
+        if component_id in get_constraint_rows(constraint, component_id, constraints_list):
+            placement_constraints.append(constraint)
+        elif not check_constraint(constraint, matrix, component_id, constraints_list):
+            return -1
+
+    # The free space of the machines is computed once for the matrix, and then kept up to date by it
+    if matrix.tracked_types != types:
+        track_free_space(matrix, types, offers_list, components_list)
+    # With a single comparison we find all the machines that have enough space for the component
+    for column in matrix.columns_with_space(component_id):
         if check_column_placement(matrix, column, component_id, constraints_list):
-            free_space = get_free_space(types[column], matrix, column, offers_list, components_list)
-            if check_enough_space(free_space, component_id, components_list):
-                test_matrix = deepcopy(matrix)
-                test_matrix[component_id][column] = 1
-                false_constraints = check_constraints(constraints_list, test_matrix, component_id)
-                if not false_constraints:
-                    return column
+            # The component is placed on the machine only while we check the constraints, without copying the matrix
+            with matrix.trial(component_id, column):
+                fulfilled = all(check_constraint(constraint, matrix, component_id, constraints_list)
+                                for constraint in placement_constraints)
+            if fulfilled:
+                return column
     return -1
 
 
+def track_free_space(matrix, types, offers_list, components_list):
+    """
+    Makes the matrix keep the free space of every machine, using the capacity of the machine types from the type array
+
+    Args:
+        matrix: The assignment matrix whose machines' free space is kept
+        types: The type array that corresponds to the assignment matrix
+        offers_list: The list of virtual machine offers from which we can choose
+        components_list: The list of components involved in our problem and their hardware requirements
+    """
+    resources = [resource for resource in components_list[0] if resource != 'Name']
+    requirements = np.array([[component[resource] for resource in resources] for component in components_list],
+                            dtype=np.int64)
+    capacities = np.array([[offers_list[machine_id][resource] for resource in resources] for machine_id in types],
+                          dtype=np.int64).reshape(len(types), len(resources))
+    matrix.track_free_space(capacities, requirements, types)
+
+
 def get_solution(matrix, initial_matrix, types, prices, offers_list, components_list):
     """
     We can have 2 kinds of solution handling
@@ -977,7 +1247,7 @@ def get_solution(matrix, initial_matrix, types, prices, offers_list, components_
     # In that case, we just need to return the matrix and arrays with price and vm types; they are not modified
     if not new_components_resources:
         output_dictionary = {
-            'Assignment Matrix': matrix,
+            'Assignment Matrix': matrix.to_list(),
             'Type Array': types,
             'Price Array': prices
         }
@@ -989,7 +1259,7 @@ def get_solution(matrix, initial_matrix, types, prices, offers_list, components_
         types.append(machine_id)
         prices.append(offers_list[machine_id]['Price'])
     output_dictionary = {
-        'Assignment Matrix': matrix,
+        'Assignment Matrix': matrix.to_list(),
         'Type Array': types,
         'Price Array': prices
     }
@@ -997,7 +1267,264 @@ def get_solution(matrix, initial_matrix, types, prices, offers_list, components_
     return output_dictionary
 
 
-def write_solution(file, dictionary, runtime):
+class LocalSearch:
+    """
+    The improvement stage applied to the solution of a greedy algorithm
+    Only the new machines (the columns added after the initial matrix) are changed, the machines of the initial
+    solution keep their types and can only receive components. Two moves are tried: merging two new machines into one
+    and moving a component from a new machine to another machine (which can also be a new machine added for it, when
+    two small machines are cheaper than a big one). Every changed machine gets again the cheapest offer
+    that fits its components, and a move is kept only when it lowers the price and the constraint checker doesn't find
+    any constraint that it broke. The moves are applied on the matrix in place and undone when they are rejected, the
+    constraints are verified by an IncrementalChecker for every component, only on the cells the move changed.
+    """
+
+    def __init__(self, initial_columns, components_list, constraints_list, offers_list):
+        """
+        Args:
+            initial_columns: The number of columns of the initial assignment matrix
+            components_list: The list of components involved in our problem and their hardware requirements
+            constraints_list: The list with all the constraints that our problem must fulfill
+            offers_list: The list of virtual machine offers from which we can choose
+        """
+        if not isinstance(constraints_list, ConstraintList):
+            constraints_list = compile_constraints(constraints_list)
+        if not isinstance(offers_list, OfferCatalog):
+            offers_list = OfferCatalog(offers_list)
+        self.initial_columns = initial_columns
+        self.constraints_list = constraints_list
+        self.offers_list = offers_list
+        self.resources = [resource for resource in components_list[0] if resource != 'Name']
+        self.requirements = np.array([[component[resource] for resource in self.resources]
+                                      for component in components_list], dtype=np.int64)
+        # A component that must be on the same machines as another one is never moved alone
+        self.collocated = {constraint[id_key] for constraint in constraints_list if constraint['type'] == 'Collocation'
+                           for id_key in ['alphaCompId', 'betaCompId']}
+
+    def get_offer(self, components):
+        """
+        Finds the cheapest offer for a new machine with the given components deployed on it
+
+        Args:
+            components: The ids of the components deployed on the machine
+
+        Returns:
+            offer: A tuple (offer_id, price), (-1, 0) when there is no component to deploy or None when no offer has
+                   enough resources
+        """
+        if not components:
+            return -1, 0
+        resources = self.requirements[components].sum(axis=0)
+        offer_id = self.offers_list.cheapest_fit(dict(zip(self.resources, resources.tolist())))
+        if offer_id < 0:
+            return None
+        return offer_id, self.offers_list[offer_id]['Price']
+
+    def has_conflicts(self, first_components, second_components):
+        """
+        Checks if a component from the first list is in conflict with a component from the second one
+
+        Args:
+            first_components: The ids of the first group of components
+            second_components: The ids of the second group of components
+
+        Returns:
+            response: Boolean value that is True if the two groups can not be deployed on the same machine
+        """
+        for component_id in first_components:
+            component_conflicts = self.constraints_list.component_conflicts.get(component_id, [])
+            if any(other_id in component_conflicts for other_id in second_components):
+                return True
+        return False
+
+    def has_space(self, matrix, types, column_id, component_id):
+        """
+        Checks if a machine of the initial solution has enough free space for one more component
+        Like in check_enough_space, some space must be left for every resource
+
+        Args:
+            matrix: The current assignment matrix
+            types: The type array that corresponds to the assignment matrix
+            column_id: The index of the column that corresponds to the machine
+            component_id: The index of the row that corresponds to the component
+
+        Returns:
+            response: Boolean value that is True if the component can be deployed on the machine
+        """
+        capacity = np.array([self.offers_list[types[column_id]][resource] for resource in self.resources])
+        used = self.requirements[matrix.deployed_components(column_id)].sum(axis=0)
+        return bool(np.all(capacity - used - self.requirements[component_id] > 0))
+
+    def check(self, checkers, matrix):
+        """
+        Checks the constraints again for every component, only on the cells modified since the previous check
+
+        Args:
+            checkers: The incremental checkers of the components, in the order of the rows
+            matrix: The current assignment matrix
+
+        Returns:
+            false_constraints: A list with the false constraints found by the checker for every component
+        """
+        changes = matrix.pop_changes()
+        return [checker.check(matrix, changes) for checker in checkers]
+
+    @staticmethod
+    def apply_move(matrix, cells):
+        """
+        Changes the assignment matrix in place, a column equal to the number of columns adds a new machine
+
+        Args:
+            matrix: The current assignment matrix
+            cells: The list of (row, column, value) changes of the move
+
+        Returns:
+            undo_cells: The changes that give back the previous matrix, a machine added by the move is left empty
+        """
+        undo_cells = []
+        for row, column, value in cells:
+            if column == matrix.columns:
+                matrix.append_column(row)
+                undo_cells.append((row, column, 0))
+            else:
+                undo_cells.append((row, column, matrix[row, column]))
+                matrix[row, column] = value
+        return undo_cells[::-1]
+
+    def get_moves(self, matrix, types, prices):
+        """
+        Generates the moves that lower the price of the solution, first the merges and then the component moves
+
+        Args:
+            matrix: The current assignment matrix
+            types: The type array that corresponds to the assignment matrix
+            prices: The price array that corresponds to the assignment matrix
+
+        Yields:
+            move: A tuple (cells, offers), where cells is a list of (row, column, value) changes of the matrix and
+                  offers gives the new (offer_id, price) of the new machines that are changed or added
+        """
+        columns = {column: matrix.deployed_components(column) for column in range(self.initial_columns, matrix.columns)}
+        used_columns = [column for column, components in columns.items() if components]
+
+        # All the components of the second machine are moved on the first one
+        for first, second in itertools.combinations(used_columns, 2):
+            if set(columns[first]) & set(columns[second]) or self.has_conflicts(columns[first], columns[second]):
+                continue
+            offer = self.get_offer(columns[first] + columns[second])
+            if offer is not None and offer[1] < prices[first] + prices[second]:
+                cells = [(component_id, second, 0) for component_id in columns[second]]
+                cells += [(component_id, first, 1) for component_id in columns[second]]
+                yield cells, {first: offer, second: (-1, 0)}
+
+        # A single component leaves a new machine, for a machine of the initial solution, another new machine or a
+        # machine that is added for it (the column after the last one, unless a new machine was left empty)
+        targets = list(range(matrix.columns))
+        if len(used_columns) == len(columns):
+            targets.append(matrix.columns)
+        for source in used_columns:
+            for component_id in columns[source]:
+                if component_id in self.collocated:
+                    continue
+                source_offer = self.get_offer([other_id for other_id in columns[source] if other_id != component_id])
+                for target in targets:
+                    if target == matrix.columns:
+                        target_components = []
+                    elif target in columns:
+                        target_components = columns[target]
+                    else:
+                        target_components = matrix.deployed_components(target)
+                    if target == source or component_id in target_components \
+                            or self.has_conflicts([component_id], target_components):
+                        continue
+                    if target < self.initial_columns:
+                        if not self.has_space(matrix, types, target, component_id):
+                            continue
+                        offers = {source: source_offer}
+                    else:
+                        target_offer = self.get_offer(target_components + [component_id])
+                        if target_offer is None:
+                            continue
+                        offers = {source: source_offer, target: target_offer}
+                    if sum(offer[1] for offer in offers.values()) < sum(prices[column] for column in offers
+                                                                        if column < len(prices)):
+                        yield [(component_id, source, 0), (component_id, target, 1)], offers
+
+    def improve(self, result, deadline):
+        """
+        Applies the first move that lowers the price, until no move does it or the deadline is reached
+
+        Args:
+            result: The output dictionary of a greedy algorithm
+            deadline: The time (as returned by time.time()) when the search stops
+
+        Returns:
+            output_dictionary: The output dictionary of the improved solution, without the new machines that were
+                               left empty
+        """
+        matrix = AssignmentMatrix.from_list(result['Assignment Matrix'])
+        types = list(result['Type Array'])
+        prices = list(result['Price Array'])
+        checkers = [IncrementalChecker(self.constraints_list, component_id)
+                    for component_id in range(len(self.requirements))]
+        false_constraints = self.check(checkers, matrix)
+
+        improved = True
+        while improved and time.time() < deadline:
+            improved = False
+            for cells, offers in self.get_moves(matrix, types, prices):
+                if time.time() >= deadline:
+                    break
+                undo_cells = self.apply_move(matrix, cells)
+                # A machine added by the move stays in the matrix (empty) even if the move is undone
+                types += [-1] * (matrix.columns - len(types))
+                prices += [0] * (matrix.columns - len(prices))
+                # The move must not break a constraint, the ones that were already false can stay false
+                new_false_constraints = self.check(checkers, matrix)
+                if any(constraint not in old_constraints
+                       for old_constraints, constraints in zip(false_constraints, new_false_constraints)
+                       for constraint in constraints):
+                    self.apply_move(matrix, undo_cells)
+                    self.check(checkers, matrix)
+                    continue
+                false_constraints = new_false_constraints
+                for column, (offer_id, price) in offers.items():
+                    types[column] = offer_id
+                    prices[column] = price
+                improved = True
+                break
+
+        kept_columns = [column for column in range(matrix.columns)
+                        if column < self.initial_columns or matrix.deployed_components(column)]
+        output_dictionary = {
+            'Assignment Matrix': [[row[column] for column in kept_columns] for row in matrix.to_list()],
+            'Type Array': [types[column] for column in kept_columns],
+            'Price Array': [prices[column] for column in kept_columns]
+        }
+        return output_dictionary
+
+
+@profiler.profiled('improve_solution')
+def improve_solution(result, initial_matrix, components_list, constraints_list, offers_list, improvement_time):
+    """
+    Tries to lower the price of a greedy solution by changing its new machines, for at most 'improvement_time' seconds
+
+    Args:
+        result: The output dictionary of a greedy algorithm
+        initial_matrix: The first assignment matrix configuration, before trying to solve the problem
+        components_list: The list of components involved in our problem and their hardware requirements
+        constraints_list: The list with all the constraints that our problem must fulfill
+        offers_list: The list of virtual machine offers from which we can choose
+        improvement_time: The number of seconds after which the search stops
+
+    Returns:
+        output_dictionary: The output dictionary of the improved solution (the given one if nothing was improved)
+    """
+    local_search = LocalSearch(initial_matrix.columns, components_list, constraints_list, offers_list)
+    return local_search.improve(result, time.time() + improvement_time)
+
+
+def write_solution(file, dictionary, runtime, profile_report=None, lower_bound=None, improvement_time=0):
     """
     This function receives a file and a dictionary that contains the problem solution
     It will write the solution in the file, using csv convention
@@ -1006,15 +1533,28 @@ def write_solution(file, dictionary, runtime):
        file: Path to the output file that we want to write to
        dictionary: A list of dictionaries that contain our problem's output (minimum price, minimum price for each vm)
        runtime: The time it took for the problem to be solved
+       profile_report: The profiling report of the run, if it is given it is written next to the output file
+       lower_bound: A lower bound of the optimal price, if it is given it is written with the optimality gap
+       improvement_time: The seconds given to the local search that improved the solution, it is written when the
+                         solution was improved, so these results are not mistaken for the ones of the greedy algorithms
     """
     with open(file, mode='w', newline='') as f:
         fieldnames = ['Price min value', 'Price for each machine', 'Time']
+        min_price = sum(dictionary['Price Array'])
+        row = {'Price min value': min_price, 'Price for each machine': dictionary['Price Array'], 'Time': runtime}
+        if lower_bound is not None:
+            fieldnames += ['Lower bound', 'Gap']
+            row['Lower bound'] = lower_bound
+            row['Gap'] = get_optimality_gap(min_price, lower_bound)
+        if improvement_time > 0:
+            fieldnames.append('Local search time')
+            row['Local search time'] = improvement_time
         writer = csv.DictWriter(f, fieldnames=fieldnames)
 
         writer.writeheader()
-        min_price = sum(dictionary['Price Array'])
-        writer.writerow({'Price min value': min_price, 'Price for each machine': dictionary['Price Array'],
-                         'Time': runtime})
+        writer.writerow(row)
+    if profile_report is not None:
+        profiler.write_report(file, profile_report)
 
 
 def solve_existing_machines(assignment_matrix, component_id, types, prices,
@@ -1037,15 +1577,15 @@ def solve_existing_machines(assignment_matrix, component_id, types, prices,
        output_dictionary: A list of dictionaries that contain our problem's output
                           (minimum price, minimum price for each vm)
     """
-    new_matrix = deepcopy(assignment_matrix)
-    new_matrix[component_id][new_component_column] = 1
+    new_matrix = assignment_matrix.copy()
+    new_matrix[component_id, new_component_column] = 1
     output_dictionary = get_solution(assignment_matrix, assignment_matrix, types,
                                      prices, offers_list, components_list)
     return output_dictionary
 
 
 def greedy(assignment_matrix, component_id, types, prices, components_list,
-           component_constraints, constraints_list, offers_list, greedy_type, component_goal):
+           component_constraints, constraints_list, offers_list, greedy_type, component_goal, improvement_time=0):
     """
     This method is used to apply the suitable greedy algorithm of the two options (min vm or distinct vm)
     Since the process is almost identical, we have this method that can apply both of them
@@ -1063,6 +1603,8 @@ def greedy(assignment_matrix, component_id, types, prices, components_list,
         greedy_type: We need to specify which type of Greedy approach we will use to solve the problem
                      The 2 possible values are min_vm or distinct_vm
         component_goal:
+        improvement_time: The number of seconds given to the local search that improves the solution, it is not
+                          applied when it is 0
 
     Returns:
         output_dictionary: A list of dictionaries that contain our problem's output
@@ -1070,12 +1612,12 @@ def greedy(assignment_matrix, component_id, types, prices, components_list,
                           If the problem can't be solved this will be a message that tries to explain what went wrong
     """
     if component_goal:
-        new_matrix = deepcopy(assignment_matrix)
+        new_matrix = assignment_matrix.copy()
         while compute_frequency(component_id, new_matrix) < component_goal:
-            new_matrix = add_column(new_matrix, component_id)
+            new_matrix.append_column(component_id)
     else:
-        new_matrix = deepcopy(assignment_matrix)
-        new_matrix = add_column(new_matrix, component_id)
+        new_matrix = assignment_matrix.copy()
+        new_matrix.append_column(component_id)
 
     if greedy_type == "min_vm":
         new_matrix = get_final_matrix(
@@ -1095,10 +1637,44 @@ def greedy(assignment_matrix, component_id, types, prices, components_list,
         new_price_array = deepcopy(prices)
         output_dictionary = get_solution(new_matrix, assignment_matrix, new_vm_types,
                                          new_price_array, offers_list, components_list)
+        if improvement_time > 0:
+            output_dictionary = improve_solution(output_dictionary, assignment_matrix, components_list,
+                                                 constraints_list, offers_list, improvement_time)
         return output_dictionary
 
 
-def validate_result(result, minizinc_solution, greedy_type, runtime, initial_number):
+def get_target_instances(initial_number, component_goal):
+    """
+    Args:
+        initial_number: The initial number of deployed instances of the added component
+        component_goal: The number of instances that we want to have deployed in the system of the added component
+                        Can be null, if we only want to add 1 instance
+
+    Returns:
+        instances_number: The number of instances of the added component that was asked for
+    """
+    return component_goal if component_goal else initial_number + 1
+
+
+def get_result_lower_bound(price_bound, instances_number):
+    """
+    Finds the lower bound of the optimal price for the number of instances that was asked for
+    It doesn't depend on the instances deployed by the solution, which can be more than the ones asked for
+
+    Args:
+        price_bound: The PriceLowerBound of the problem, or None
+        instances_number: The number of instances of the added component that was asked for
+
+    Returns:
+        lower_bound: The lower bound of the price, or None if there is no PriceLowerBound
+    """
+    if price_bound is None:
+        return None
+    return price_bound.get_lower_bound(instances_number)
+
+
+def validate_result(result, minizinc_solution, greedy_type, runtime, initial_number, profile_report=None,
+                    price_bound=None, instances_number=None, improvement_time=0):
     """
     This function is used to verify if the problem was solved or not
 
@@ -1108,6 +1684,11 @@ def validate_result(result, minizinc_solution, greedy_type, runtime, initial_num
         greedy_type: The greedy method that was used to obtain this particular result
         runtime: The time that it took for the problem to be solved
         initial_number: The initial number of deployed components
+        profile_report: The profiling report of the run, or None if the profiling is disabled
+        price_bound: The PriceLowerBound of the problem, if it is given the optimality gap of the result is written
+        instances_number: The number of instances of the added component that was asked for, used for the lower
+                          bound (if it is None, one more than the initial number)
+        improvement_time: The seconds given to the local search that improved the result, 0 if it was not applied
     """
     # If the type the output is str, it means the output is just the error message saying what went wrong
     if type(result) == str:
@@ -1118,12 +1699,14 @@ def validate_result(result, minizinc_solution, greedy_type, runtime, initial_num
         minizinc_solution = minizinc_solution.replace('Input/Greedy_Input/', '')
         minizinc_solution = minizinc_solution.replace('_Input.json', '')
         file_name = minizinc_solution.split('_')
-        file_name[0] = file_name[0].replace(f'{initial_number}',f'{initial_number + 1}')
+        file_name[0] = file_name[0].replace(f'{initial_number}', f'{initial_number + 1}')
         minizinc_solution = file_name[0] + "_" + file_name[1]
-        write_solution(f"Output/Greedy_Output/{greedy_type}/{minizinc_solution}_{greedy_type}.csv", result, runtime)
+        write_solution(f"Output/Greedy_Output/{greedy_type}/{minizinc_solution}_{greedy_type}.csv", result, runtime,
+                       profile_report, get_result_lower_bound(price_bound, instances_number or initial_number + 1),
+                       improvement_time)
 
 
-def solve_problem(problem_file, offers_file, minizinc_solution, added_component, component_goal):
+def solve_problem(problem_file, offers_file, minizinc_solution, added_component, component_goal, improvement_time=0):
     """
     The actual 'solving' method, where we apply the previous functions to solve the problem
 
@@ -1134,17 +1717,21 @@ def solve_problem(problem_file, offers_file, minizinc_solution, added_component,
         added_component: The id of the component that we want to add to the application
         component_goal: The number of instances that we want to have deployed in the system of the added component
                         Can be null, if we only want to add 1 instance
+        improvement_time: The number of seconds given to the local search after each greedy algorithm (0 disables it)
     """
     components_list = get_components(problem_file)
 
-    constraints_list = get_constraints(problem_file)
+    # The constraints are compiled once, so the solving steps don't have to look up their functions
+    constraints_list = compile_constraints(get_constraints(problem_file))
 
-    offers_list = get_offers(offers_file)
+    # The catalog is built once, so the offers are not sorted again every time we choose a machine
+    offers_list = OfferCatalog(get_offers(offers_file))
+    price_bound = PriceLowerBound(problem_file, components_list, offers_list, added_component)
 
     existing_solution = parse_existing_solution(minizinc_solution)
 
     # Load the necessary input from the existing solution
-    assignment_matrix = existing_solution['Assignment Matrix']
+    assignment_matrix = AssignmentMatrix.from_list(existing_solution['Assignment Matrix'])
     vm_types = existing_solution["Type Array"]
     prices = existing_solution["Price Array"]
     component_id = added_component
@@ -1152,7 +1739,9 @@ def solve_problem(problem_file, offers_file, minizinc_solution, added_component,
     component_constraints = get_component_constraints(component_id, constraints_list)
 
     component_instances_initial = compute_frequency(added_component, assignment_matrix)
+    instances_number = get_target_instances(component_instances_initial, component_goal)
 
+    profiler.reset()
     start_time = time.time()
 
     # If we can place the component on a machine that we already have, this will get the value of that machine's id
@@ -1167,7 +1756,8 @@ def solve_problem(problem_file, offers_file, minizinc_solution, added_component,
                                          components_list, new_component_column, offers_list)
 
         run_time = time.time() - start_time
-        write_solution(f"{minizinc_solution.replace('_Input.json', '')}_Output.csv", result, run_time)
+        write_solution(f"{minizinc_solution.replace('_Input.json', '')}_Output.csv", result, run_time,
+                       profiler.get_report(), get_result_lower_bound(price_bound, instances_number))
         return
     # If we reach here it means we will need at least 1 new machine (for the added component)
     # Using the get_final_matrix method we find out either the new assignment matrix or an error message
@@ -1177,47 +1767,232 @@ def solve_problem(problem_file, offers_file, minizinc_solution, added_component,
         # We save it now so we can add it later to the second algorithm
         intermediary_time = time.time() - start_time
         result_min_vm = greedy(assignment_matrix, component_id, vm_types, prices, components_list,
-                               component_constraints, constraints_list, offers_list, "min_vm", component_goal)
+                               component_constraints, constraints_list, offers_list, "min_vm", component_goal,
+                               improvement_time)
 
         run_time_min_vm = time.time() - start_time
+        # The search for an existing machine is done once, so it is only in the report of the first algorithm
+        profile_report_min_vm = profiler.get_report()
+        profiler.reset()
         start_time = time.time()
 
         result_distinct_vm = greedy(assignment_matrix, component_id, vm_types, prices, components_list,
-                                    component_constraints, constraints_list, offers_list, "distinct_vm", component_goal)
+                                    component_constraints, constraints_list, offers_list, "distinct_vm", component_goal,
+                                    improvement_time)
 
         run_time_distinct_vm = time.time() - start_time + intermediary_time
+        profile_report_distinct_vm = profiler.get_report()
 
-        validate_result(result_min_vm, minizinc_solution, "MinVM", run_time_min_vm, component_instances_initial)
+        validate_result(result_min_vm, minizinc_solution, "MinVM", run_time_min_vm, component_instances_initial,
+                        profile_report_min_vm, price_bound, instances_number, improvement_time)
         validate_result(result_distinct_vm, minizinc_solution, "DistinctVM",
-                        run_time_distinct_vm, component_instances_initial)
+                        run_time_distinct_vm, component_instances_initial, profile_report_distinct_vm, price_bound,
+                        instances_number, improvement_time)
 
         return
 
 
+def get_greedy_solution(problem_file, offers_file, minizinc_solution, added_component, component_goal, greedy_type,
+                        improvement_time=0):
+    """
+    Applies one of the greedy algorithms on a MiniZinc solution and returns the result, without writing it
+    Unlike solve_problem, the component is never placed on the existing machines, so the result always has
+    at least one more instance of it (or at least 'component_goal' instances)
+
+    Args:
+        problem_file: The path to the file that contains the problem information (the components and constraints)
+        offers_file: The path to the file that contains the virtual machine offers
+        minizinc_solution: The path to the minizinc solution that will be used as input to our problem
+        added_component: The id of the component that we want to add to the application
+        component_goal: The number of instances that we want to have deployed in the system of the added component
+                        Can be null, if we only want to add 1 instance
+        greedy_type: The greedy method that is applied, min_vm or distinct_vm
+        improvement_time: The number of seconds given to the local search that improves the solution (0 disables it)
+
+    Returns:
+        output_dictionary: A dictionary with the assignment matrix, the type array and the price array
+                           If the problem can't be solved this will be a message that tries to explain what went wrong
+    """
+    components_list = get_components(problem_file)
+    constraints_list = compile_constraints(get_constraints(problem_file))
+    offers_list = OfferCatalog(get_offers(offers_file))
+    existing_solution = parse_existing_solution(minizinc_solution)
+    assignment_matrix = AssignmentMatrix.from_list(existing_solution['Assignment Matrix'])
+    component_constraints = get_component_constraints(added_component, constraints_list)
+    return greedy(assignment_matrix, added_component, existing_solution["Type Array"],
+                  existing_solution["Price Array"], components_list, component_constraints,
+                  constraints_list, offers_list, greedy_type, component_goal, improvement_time)
+
+
+# The names of the output directories for each greedy type
+GREEDY_OUTPUT_NAMES = {
+    'min_vm': 'MinVM',
+    'distinct_vm': 'DistinctVM'
+}
+
+# The problem and the offers shared by all the jobs of a batch, each worker process receives them once at startup
+BATCH_INPUT = {}
+
+
+def init_batch_worker(components_list, constraints_list, offers_catalogs, profiling=False, improvement_time=0):
+    """
+    Stores in the worker process the input that is shared by all the jobs of a batch
+
+    Args:
+        components_list: The list of components involved in our problem and their hardware requirements
+        constraints_list: The compiled list with all the constraints that our problem must fulfill
+        offers_catalogs: A dictionary with the OfferCatalog of every offers number used in the batch
+        profiling: A boolean value that is True if the jobs are profiled
+        improvement_time: The number of seconds given to the local search after each greedy algorithm
+    """
+    profiler.enable(profiling)
+    BATCH_INPUT['components_list'] = components_list
+    BATCH_INPUT['constraints_list'] = constraints_list
+    BATCH_INPUT['offers_catalogs'] = offers_catalogs
+    BATCH_INPUT['improvement_time'] = improvement_time
+
+
+def get_batch_jobs(problem_name, offers, lower_bound, upper_bound, component_to_add):
+    """
+    Builds the list of jobs of a batch, one for every (instances, offers, greedy type) combination
+    When there is no MiniZinc solution for a number of instances, we start from the Wordpress7 solution and
+    deploy the added component until the wanted number of instances is reached (except for 500 offers)
+
+    The output file name depends only on the MiniZinc solution and the greedy type, so the jobs that share them
+    write to the same file. In a sequential run the last of these jobs overwrites the others, so it is the only one
+    that we keep.
+
+    Args:
+        problem_name: The name of the problem, used to find the input files
+        offers: A list with the numbers of offers that are used
+        lower_bound: The first number of instances
+        upper_bound: The number of instances where we stop (it is not included)
+        component_to_add: The id of the component that we want to add to the application
+
+    Returns:
+        jobs: A list of tuples (minizinc_solution, offers_number, added_component, component_goal, greedy_type)
+    """
+    jobs = []
+    for component_instances in range(lower_bound, upper_bound):
+        for offers_number in offers:
+            input_file = f"Input/Greedy_Input/{problem_name}{component_instances}_Offers{offers_number}_Input.json"
+            if Path(input_file).is_file():
+                component_goal = None
+            elif offers_number != 500:
+                input_file = f"Input/Greedy_Input/{problem_name}7_Offers{offers_number}_Input.json"
+                component_goal = component_instances
+            else:
+                continue
+            for greedy_type in GREEDY_OUTPUT_NAMES:
+                jobs.append((input_file, offers_number, component_to_add, component_goal, greedy_type))
+    last_jobs = {(job[0], job[4]): index for index, job in enumerate(jobs)}
+    return [job for index, job in enumerate(jobs) if last_jobs[(job[0], job[4])] == index]
+
+
+def run_batch_job(minizinc_solution, offers_number, added_component, component_goal, greedy_type):
+    """
+    Solves a single job of a batch in a worker process, using the input received by init_batch_worker
+
+    Args:
+        minizinc_solution: The path to the minizinc solution that will be used as input to our problem
+        offers_number: The number of offers that is used for this job
+        added_component: The id of the component that we want to add to the application
+        component_goal: The number of instances that we want to have deployed in the system of the added component
+                        Can be null, if we only want to add 1 instance
+        greedy_type: The greedy method that is applied, min_vm or distinct_vm
+
+    Returns:
+        job_result: A tuple (result, runtime, initial_number, solved_on_existing_machines, profile_report), where
+                    result is the output dictionary or the error message returned by the greedy algorithm
+    """
+    components_list = BATCH_INPUT['components_list']
+    constraints_list = BATCH_INPUT['constraints_list']
+    offers_list = BATCH_INPUT['offers_catalogs'][offers_number]
+
+    existing_solution = parse_existing_solution(minizinc_solution)
+    assignment_matrix = AssignmentMatrix.from_list(existing_solution['Assignment Matrix'])
+    vm_types = existing_solution["Type Array"]
+    prices = existing_solution["Price Array"]
+    component_constraints = get_component_constraints(added_component, constraints_list)
+    component_instances_initial = compute_frequency(added_component, assignment_matrix)
+
+    profiler.reset()
+    start_time = time.time()
+    new_component_column = check_existing_machines(assignment_matrix, vm_types, added_component,
+                                                   components_list, constraints_list, offers_list)
+    if new_component_column >= 0:
+        result = solve_existing_machines(assignment_matrix, added_component, vm_types, prices,
+                                         components_list, new_component_column, offers_list)
+        return result, time.time() - start_time, component_instances_initial, True, profiler.get_report()
+
+    result = greedy(assignment_matrix, added_component, vm_types, prices, components_list,
+                    component_constraints, constraints_list, offers_list, greedy_type, component_goal,
+                    BATCH_INPUT['improvement_time'])
+    return result, time.time() - start_time, component_instances_initial, False, profiler.get_report()
+
+
+def solve_batch(problem_name, offers, lower_bound, upper_bound, component_to_add, max_workers=None,
+                improvement_time=0):
+    """
+    Solves every (instances, offers, greedy type) combination of a problem in parallel, using a pool of processes
+    The problem description and the offers files are loaded only once and shared with the workers.
+    Every result is written to its output file as soon as its job is finished.
+
+    Args:
+        problem_name: The name of the problem, used to find the input files
+        offers: A list with the numbers of offers that are used
+        lower_bound: The first number of instances
+        upper_bound: The number of instances where we stop (it is not included)
+        component_to_add: The id of the component that we want to add to the application
+        max_workers: The number of worker processes, if it is None we use one for every processor
+        improvement_time: The number of seconds given to the local search after each greedy algorithm (0 disables it)
+    """
+    problem_file = f"Input/Problem_Description/{problem_name}.json"
+    components_list = get_components(problem_file)
+    constraints_list = compile_constraints(get_constraints(problem_file))
+    offers_catalogs = {
+        offers_number: OfferCatalog(get_offers(f"Input/Offers/offers_{offers_number}.json"))
+        for offers_number in offers
+    }
+    # The lower bounds are computed in this process, every number of instances only once for each catalog
+    price_bounds = {
+        offers_number: PriceLowerBound(problem_file, components_list, offers_catalog, component_to_add)
+        for offers_number, offers_catalog in offers_catalogs.items()
+    }
+
+    jobs = get_batch_jobs(problem_name, offers, lower_bound, upper_bound, component_to_add)
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=init_batch_worker,
+                             initargs=(components_list, constraints_list, offers_catalogs,
+                                       profiler.ENABLED, improvement_time)) as executor:
+        futures = {executor.submit(run_batch_job, *job): job for job in jobs}
+        for future in as_completed(futures):
+            minizinc_solution, offers_number, added_component, component_goal, greedy_type = futures[future]
+            result, run_time, initial_number, solved_on_existing_machines, profile_report = future.result()
+            # The lower bound is the one of the problem that was asked for
+            instances_number = get_target_instances(initial_number, component_goal)
+            if solved_on_existing_machines:
+                write_solution(f"{minizinc_solution.replace('_Input.json', '')}_Output.csv", result, run_time,
+                               profile_report, get_result_lower_bound(price_bounds[offers_number], instances_number))
+            else:
+                validate_result(result, minizinc_solution, GREEDY_OUTPUT_NAMES[greedy_type], run_time, initial_number,
+                                profile_report, price_bounds[offers_number], instances_number, improvement_time)
+
+
 if __name__ == '__main__':
     problem_name = "Wordpress"
     offers = [20, 40, 250, 500]
     lower_bound = 3
     upper_bound = 12
     component_to_add = 0
-
-    for component_instances in range(lower_bound, upper_bound):
-        for offers_number in offers:
-            input_file = Path(f"Input/Greedy_Input/{problem_name}{component_instances}_Offers{offers_number}_Input.json")
-            if input_file.is_file():
-                solve_problem(
-                    f"Input/Problem_Description/{problem_name}.json",
-                    f"Input/Offers/offers_{offers_number}.json",
-                    f"Input/Greedy_Input/{problem_name}{component_instances}_Offers{offers_number}_Input.json",
-                    component_to_add,
-                    None
-                )
-            elif offers_number != 500:
-                solve_problem(
-                    f"Input/Problem_Description/{problem_name}.json",
-                    f"Input/Offers/offers_{offers_number}.json",
-                    f"Input/Greedy_Input/{problem_name}7_Offers{offers_number}_Input.json",
-                    component_to_add,
-                    component_instances
-                )
+    # The number of processes used to solve the problems, None means one for every processor
+    workers = None
+    # Write a profiling report next to every output file (it can also be enabled with GREEDY_PROFILE=1)
+    profiling = False
+    if profiling:
+        profiler.enable()
+    # The seconds given to the local search that improves every greedy solution, 0 keeps the greedy solutions as they are
+    # The improved solutions have a 'Local search time' column, so they can be told apart from the greedy ones
+    improvement_time = 0
+
+    solve_batch(problem_name, offers, lower_bound, upper_bound, component_to_add, workers, improvement_time)
 
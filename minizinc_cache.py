@@ -0,0 +1,106 @@
+import hashlib
+import json
+import os
+
+from minizinc import Status
+
+"""
+This file contains the cache of the results obtained with MiniZinc.
+A result is stored under a hash of everything that can change it: the model, the input data, the parameters of the
+instance (M and WP) and the solver with its version. If none of them changed, the result of a previous run is used
+instead of solving the problem again.
+Only the results that are final (an optimal solution or a proof that there is no solution) are stored, since solving
+again with a longer time limit could give a better result for the others.
+"""
+
+CACHE_DIRECTORY = os.path.join("Output", "MiniZinc_Cache")
+
+# The variables of the model that are kept for every solution
+SOLUTION_VARIABLES = ['a', 't', 'price']
+
+
+class CachedResult:
+    """
+    A result read from the cache, it can be used in the same way as the result of a MiniZinc instance
+    (result['price'], result.objective, result.status)
+    """
+
+    def __init__(self, entry):
+        """
+        Args:
+            entry: The dictionary stored in the cache file
+        """
+        self.status = Status[entry['status']]
+        self.objective = entry['objective']
+        self.solution = entry['solution']
+
+    def __getitem__(self, key):
+        return self.solution[key]
+
+
+def get_cache_key(model_path, data, parameters, solver):
+    """
+    Computes the key of a result, a hash of all the inputs of the solver
+
+    Args:
+        model_path: The path to the location of the MiniZinc model file
+        data: A dictionary with the input data of the model, as returned by dzn.get_dzn_data
+        parameters: A dictionary with the other parameters assigned to the instance (M, WP, ...)
+        solver: The MiniZinc Solver object that is used
+
+    Returns:
+        key: A string with the hexadecimal hash of the inputs
+    """
+    key = hashlib.sha256()
+    with open(model_path, 'rb') as f:
+        key.update(f.read())
+    key.update(json.dumps(data, sort_keys=True).encode())
+    key.update(json.dumps(parameters, sort_keys=True).encode())
+    key.update(f"{solver.id}@{solver.version}".encode())
+    return key.hexdigest()
+
+
+def load_result(key, directory=CACHE_DIRECTORY):
+    """
+    Reads a result from the cache
+
+    Args:
+        key: The key of the result, as returned by get_cache_key
+        directory: The directory of the cache
+
+    Returns:
+        result: A CachedResult and the runtime of the solve that found it, or None if the result is not in the cache
+    """
+    file = os.path.join(directory, f"{key}.json")
+    if not os.path.exists(file):
+        return None
+    with open(file) as f:
+        entry = json.load(f)
+    return CachedResult(entry), entry['runtime']
+
+
+def save_result(key, result, runtime, directory=CACHE_DIRECTORY):
+    """
+    Writes a result to the cache, if it is final (optimal or unsatisfiable)
+
+    Args:
+        key: The key of the result, as returned by get_cache_key
+        result: The result of the MiniZinc instance
+        runtime: The runtime of the solve, in seconds
+        directory: The directory of the cache
+    """
+    if result.status not in (Status.OPTIMAL_SOLUTION, Status.UNSATISFIABLE):
+        return
+    entry = {
+        'status': result.status.name,
+        'objective': result.objective if result.status.has_solution() else None,
+        'solution': {variable: result[variable] for variable in SOLUTION_VARIABLES}
+        if result.status.has_solution() else None,
+        'runtime': runtime
+    }
+    os.makedirs(directory, exist_ok=True)
+    # The entry is written to a temporary file first, so a run that is stopped never leaves a broken entry
+    file = os.path.join(directory, f"{key}.json")
+    with open(f"{file}.tmp", 'w') as f:
+        json.dump(entry, f)
+    os.replace(f"{file}.tmp", file)
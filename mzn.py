@@ -0,0 +1,353 @@
+import json
+import os
+
+"""
+This file is used to build the MiniZinc models of a problem from its description, instead of writing them by hand.
+It writes the exact model (in the same form as Models/Wordpress.mzn, optionally with the symmetry breaking and the
+redundant constraints of Models/Wordpress_Symmetry.mzn) and the surrogate model (like
+Surrogate/Wordpress_Surrogate.mzn), both from the restrictions of the same problem description file, so the greedy
+algorithms and the two MiniZinc models always solve the same problem.
+Only the constraints of the restrictions that appear in the problem are written. The number of instances of every
+component is computed once, in the 'instances' array, and used by all the restrictions on it.
+"""
+
+# The directories of the generated models, the hand-written ones are kept in Models and Surrogate
+MODELS_DIRECTORY = os.path.join("Models", "Generated")
+SURROGATE_DIRECTORY = os.path.join("Surrogate", "Generated")
+
+# The parameters, variables and general constraints of every exact model
+MODEL_HEADER = """\
+% maximal number of virtual machines needed to be deployed (taken for each number of instances from the surrogate)
+int: M;
+% number of components of the application
+int: N;
+% number of hardware requirements for a component (e.g. CPU, memory, Storage)
+int: HR;
+% number of virtual machines offers
+int: VMNR;
+% the minimum number of instances of the main component to be deployed
+int: WP;
+
+% minimum requirements for each component
+array[1..N, 1..HR] of int: compReq;
+% virtual machines offers
+array[1..VMNR, 1..HR] of int: vmOffers;
+% the cost of virtual machines offers
+array[1..VMNR] of int: prices;
+{symmetry_parameters}
+% assignment matrix a
+array[1..N, 1..M] of var 0..1: a;
+% type of VM
+array[1..M] of var {type_domain}: t;
+% occupancy vector
+array[1..M] of var 0..1: v;
+% the data of the virtual machine k
+array[1..M] of var 1..64: cpu;
+array[1..M] of var 1700..976000: mem;
+array[1..M] of var 1000..24000: storage;
+array[1..M] of var 0..16000: price;
+% the number of instances of every component
+array[1..N] of var 0..M: instances = [sum (k in 1..M) (a[i, k]) | i in 1..N];
+
+% a VM which has at least 1 deployed component has type different than 0
+constraint forall (i in 1..N, k in 1..M) (a[i, k] == 1 -> t[k] > 0);
+
+% an occupied VM has its corresponding occupancy vector initialized
+constraint forall (k in 1..M) (sum (i in 1..N) (a[i, k]) >= 1 -> v[k] = 1);
+
+% a component should be deployed on a machine that meets its hardware requirements
+constraint forall (k in 1..M, h in 1..HR) (sum (i in 1..N) (a[i, k] * compReq[i, h]) <= vmOffers[t[k], h]);
+
+{link_constraint}
+
+% an unoccupied VM has no type assigned to it
+constraint forall (k in 1..M) (sum (i in 1..N) (a[i, k]) == 0 -> t[k] = 0);
+"""
+
+LINK_CONSTRAINT = """\
+% if a machine "k" is deployed and has type "o" then the k-th cpu, storage, memory and price values correspond to it
+constraint forall (k in 1..M, o in 1..VMNR) ((v[k] == 1 /\\ t[k] == o) -> (cpu[k] = vmOffers[o, 1] /\\ \
+mem[k] = vmOffers[o, 2] /\\ storage[k] = vmOffers[o, 3] /\\ price[k] = prices[o]));"""
+
+ELEMENT_LINK_CONSTRAINT = """\
+% the k-th cpu, storage, memory and price values are the ones of the offer chosen for the machine "k"
+constraint forall (k in 1..M) (cpu[k] = vmOffers[t[k], 1] /\\ mem[k] = vmOffers[t[k], 2] /\\ \
+storage[k] = vmOffers[t[k], 3] /\\ price[k] = prices[t[k]]);"""
+
+SYMMETRY_PARAMETERS = """\
+% the minimum number of instances of each component, for any solution with WP instances (from the surrogate)
+array[1..N] of int: minInstances;
+
+include "globals.mzn";
+"""
+
+SYMMETRY_CONSTRAINTS = """\
+% the machines are ordered decreasingly by price and, for the same price, by the components deployed on them
+constraint forall (k in 1..M - 1) (lex_greatereq([price[k]] ++ [a[i, k] | i in 1..N], \
+[price[k + 1]] ++ [a[i, k + 1] | i in 1..N]));
+
+% every component has at least the number of instances found with the surrogate problem
+constraint forall (i in 1..N) (instances[i] >= minInstances[i]);
+
+% every machine is occupied, so it has at least one component
+constraint forall (k in 1..M) (sum (i in 1..N) (a[i, k]) >= 1);
+
+% the machines host at least all the instances from the surrogate problem
+constraint sum (instances) >= sum (minInstances);
+"""
+
+
+# The description and the operator of the constraint of every bound restriction
+BOUND_OPERATORS = {
+    "Lower_Bound": ("at least", ">="),
+    "Upper_Bound": ("at most", "<="),
+    "Equal_Bound": ("exactly", "=")
+}
+
+
+def get_component_names(problem):
+    """
+    Args:
+        problem: The problem description, as read from its json file
+
+    Returns:
+        names: A dictionary that maps the id of every component to its name, used in the comments of the models
+    """
+    return {component['id']: component['name'] for component in problem['components']}
+
+
+def get_exclusive_components(restrictions):
+    """
+    Args:
+        restrictions: The list of restrictions from the problem description
+
+    Returns:
+        components: The set with the ids of the components that are in an exclusive deployment
+    """
+    return {restriction[key] for restriction in restrictions if restriction['type'] == "Exclusive_Deployment"
+            for key in ('alphaCompId', 'betaCompId')}
+
+
+def get_conflicting_components(restrictions, component_id):
+    """
+    Args:
+        restrictions: The list of restrictions from the problem description
+        component_id: The id of a component
+
+    Returns:
+        components: The set with the ids of the components that are in conflict with the given one
+    """
+    components = set()
+    for restriction in restrictions:
+        if restriction['type'] != "Conflicts":
+            continue
+        if restriction['alphaCompId'] == component_id:
+            components.update(restriction['compsIdList'])
+        elif component_id in restriction['compsIdList']:
+            components.add(restriction['alphaCompId'])
+    return components
+
+
+def get_count_constraints(restriction, count, names):
+    """
+    Builds the constraints of a restriction on the number of instances of the components, which are the same in
+    the exact model and in the surrogate model (only the expression of the number of instances changes)
+
+    Args:
+        restriction: A restriction from the problem description
+        count: A function that receives the id of a component and returns the expression of its number of instances
+        names: A dictionary that maps the id of every component to its name
+
+    Returns:
+        constraints: A list of strings, each of them is a comment and a constraint of the model
+                     It is None if the restriction is not about the number of instances
+    """
+    restriction_type = restriction['type']
+    alpha = restriction.get('alphaCompId')
+    beta = restriction.get('betaCompId')
+    if restriction_type in BOUND_OPERATORS:
+        description, operator = BOUND_OPERATORS[restriction_type]
+        return [f"% {names[component]} has {description} {restriction['bound']} instances\n"
+                f"constraint {count(component)} {operator} {restriction['bound']};"
+                for component in restriction['compsIdList']]
+    if restriction_type == "Provide":
+        return [f"% if {names[beta]} is deployed, each instance of it can serve at most "
+                f"{restriction['alphaCompIdInstances']} {names[alpha]} instances\n"
+                f"constraint {count(beta)} > 0 -> "
+                f"{count(alpha)} <= {restriction['alphaCompIdInstances']} * {count(beta)};"]
+    if restriction_type == "Require_Provide":
+        return [f"% {names[alpha]} requires {restriction['betaCompIdInstances']} instances of {names[beta]} for "
+                f"every {restriction['alphaCompIdInstances']} of its instances\n"
+                f"constraint {restriction['alphaCompIdInstances']} * {count(alpha)} <= "
+                f"{restriction['betaCompIdInstances']} * {count(beta)};"]
+    if restriction_type == "Exclusive_Deployment":
+        return [f"% only one of {names[alpha]} and {names[beta]} is deployed\n"
+                f"constraint ({count(alpha)} > 0) xor ({count(beta)} > 0);"]
+    return None
+
+
+def get_model_constraints(problem, component_id=0):
+    """
+    Builds the constraints of the exact model for the restrictions of a problem
+
+    Args:
+        problem: The problem description, as read from its json file
+        component_id: The id of the main component, whose number of instances is given by WP
+
+    Returns:
+        constraints: A list of strings, each of them is a comment and a constraint of the model
+    """
+    names = get_component_names(problem)
+    exclusive_components = get_exclusive_components(problem['restrictions'])
+    constraints = [
+        f"% every component which is not in an exclusive deployment is deployed at least once\n"
+        f"constraint forall (i in {{{', '.join(str(i + 1) for i in sorted(names) if i not in exclusive_components)}}})"
+        f" (instances[i] >= 1);",
+        f"% at least WP instances of {names[component_id]} are deployed\n"
+        f"constraint instances[{component_id + 1}] >= WP;"
+    ]
+    for restriction in problem['restrictions']:
+        alpha = restriction.get('alphaCompId')
+        beta = restriction.get('betaCompId')
+        count_constraints = get_count_constraints(restriction, lambda component: f"instances[{component + 1}]", names)
+        if count_constraints is not None:
+            constraints.extend(count_constraints)
+        elif restriction['type'] == "Conflicts":
+            conflicts = ', '.join(str(component + 1) for component in restriction['compsIdList'])
+            constraints.append(
+                f"% {names[alpha]} is not deployed on the same machine as "
+                f"{', '.join(names[component] for component in restriction['compsIdList'])}\n"
+                f"constraint forall (k in 1..M, i in {{{conflicts}}}) (a[{alpha + 1}, k] + a[i, k] <= 1);"
+            )
+        elif restriction['type'] == "Collocation":
+            constraints.append(
+                f"% {names[alpha]} and {names[beta]} are always deployed on the same machines\n"
+                f"constraint forall (k in 1..M) (a[{alpha + 1}, k] = a[{beta + 1}, k]);"
+            )
+        elif restriction['type'] == "Full_Deployment":
+            conflicts = get_conflicting_components(problem['restrictions'], alpha)
+            constraints.append(
+                f"% {names[alpha]} is deployed on every machine without a component in conflict with it\n"
+                f"constraint forall (k in 1..M) (a[{alpha + 1}, k] = 1 <-> "
+                f"forall (i in {{{', '.join(str(component + 1) for component in sorted(conflicts))}}}) "
+                f"(a[i, k] = 0));"
+            )
+        else:
+            raise ValueError(f"The restriction type {restriction['type']} can't be written in a MiniZinc model.")
+    return constraints
+
+
+def generate_model(problem_file, symmetry=False, component_id=0):
+    """
+    Builds the exact MiniZinc model of a problem
+
+    Args:
+        problem_file: The path to the file that contains the problem description (the components and constraints)
+        symmetry: If it is True, the symmetry breaking and the redundant constraints are added (the model then
+                  needs the minInstances parameter)
+        component_id: The id of the main component, whose number of instances is given by WP
+
+    Returns:
+        content: The text of the model
+    """
+    with open(problem_file) as f:
+        problem = json.load(f)
+    header = MODEL_HEADER.format(
+        symmetry_parameters=SYMMETRY_PARAMETERS if symmetry else "",
+        type_domain="1..VMNR" if symmetry else "int",
+        link_constraint=ELEMENT_LINK_CONSTRAINT if symmetry else LINK_CONSTRAINT
+    )
+    parts = [
+        f"%\n% {problem['application']} application in MiniZinc, generated from {os.path.basename(problem_file)}\n%\n",
+        header,
+        "\n\n".join(get_model_constraints(problem, component_id)) + "\n"
+    ]
+    if symmetry:
+        parts.append(SYMMETRY_CONSTRAINTS)
+    parts.append("% solve the problem such that the cost of virtual machines is the minimal one\n"
+                 "solve minimize sum (p in price) (p);\n")
+    return "\n".join(parts)
+
+
+def generate_surrogate_model(problem_file, component_id=0):
+    """
+    Builds the surrogate MiniZinc model of a problem: the minimum number of instances of all the components when
+    at least n instances of the main component are deployed
+
+    Args:
+        problem_file: The path to the file that contains the problem description (the components and constraints)
+        component_id: The id of the main component, whose number of instances is given by n
+
+    Returns:
+        content: The text of the model
+    """
+    with open(problem_file) as f:
+        problem = json.load(f)
+    names = get_component_names(problem)
+    exclusive_components = get_exclusive_components(problem['restrictions'])
+    constraints = [
+        f"% every component which is not in an exclusive deployment is deployed at least once\n"
+        f"constraint forall (i in {{{', '.join(str(i + 1) for i in sorted(names) if i not in exclusive_components)}}})"
+        f" (v[i] >= 1);",
+        f"% at least n instances of {names[component_id]} are deployed\n"
+        f"constraint v[{component_id + 1}] >= n;"
+    ]
+    for restriction in problem['restrictions']:
+        count_constraints = get_count_constraints(restriction, lambda component: f"v[{component + 1}]", names)
+        if count_constraints is not None:
+            constraints.extend(count_constraints)
+        elif restriction['type'] == "Collocation":
+            constraints.append(f"% {names[restriction['alphaCompId']]} and {names[restriction['betaCompId']]} "
+                               f"always have the same number of instances\n"
+                               f"constraint v[{restriction['alphaCompId'] + 1}] = v[{restriction['betaCompId'] + 1}];")
+        # The other restrictions (conflicts, full deployments) don't change the number of instances
+    return "\n".join([
+        f"%\n% Surrogate problem of the {problem['application']} application, generated from "
+        f"{os.path.basename(problem_file)}\n%\n",
+        f"% number of instances of {names[component_id]}\nint: n;\n",
+        f"% the number of instances of every component: "
+        f"{', '.join(names[component] for component in sorted(names))}\n"
+        f"array[1..{len(names)}] of var 0..1024: v;\n",
+        "\n\n".join(constraints) + "\n",
+        "solve minimize sum (v);\n"
+    ])
+
+
+def write_model(content, model_file, problem_file):
+    """
+    Writes a generated model, if it doesn't exist or it is older than the problem description
+
+    Args:
+        content: A function that returns the text of the model, it is only called if the model is written
+        model_file: The path to the model file
+        problem_file: The path to the file that contains the problem description
+    """
+    if os.path.exists(model_file) and os.path.getmtime(model_file) >= os.path.getmtime(problem_file):
+        return
+    os.makedirs(os.path.dirname(model_file), exist_ok=True)
+    with open(model_file, 'w') as f:
+        f.write(content())
+
+
+def write_models(problem_file, problem_name, component_id=0):
+    """
+    Writes the exact model, the exact model with symmetry breaking and the surrogate model of a problem:
+    Models/Generated/<problem_name>.mzn, Models/Generated/<problem_name>_Symmetry.mzn and
+    Surrogate/Generated/<problem_name>_Surrogate.mzn
+
+    Args:
+        problem_file: The path to the file that contains the problem description (the components and constraints)
+        problem_name: The name of the problem, used in the names of the model files
+        component_id: The id of the main component
+    """
+    write_model(lambda: generate_model(problem_file, False, component_id),
+                os.path.join(MODELS_DIRECTORY, f"{problem_name}.mzn"), problem_file)
+    write_model(lambda: generate_model(problem_file, True, component_id),
+                os.path.join(MODELS_DIRECTORY, f"{problem_name}_Symmetry.mzn"), problem_file)
+    write_model(lambda: generate_surrogate_model(problem_file, component_id),
+                os.path.join(SURROGATE_DIRECTORY, f"{problem_name}_Surrogate.mzn"), problem_file)
+
+
+if __name__ == '__main__':
+    problem_name = input("Introduce the problem name(should start with uppercase letter):\n")
+    write_models(f"Input/Problem_Description/{problem_name}.json", problem_name)
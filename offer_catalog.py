@@ -0,0 +1,305 @@
+import json
+import os
+import re
+from array import array
+
+import numpy as np
+
+"""
+This file contains the catalog of virtual machine offers used by the greedy algorithm to choose new machines.
+The catalog is built once from the offers list and it answers the question:
+"which is the cheapest offer that satisfies these hardware requirements?" without sorting or scanning all the offers.
+
+It also contains the loader of the offers files. The files are read in small chunks, one offer at a time, and the
+offers are stored in NumPy arrays (one for every field), so even files with hundreds of thousands of offers don't
+have to be fully loaded in memory. The arrays are saved in a binary cache file next to the offers file.
+A field keeps the numeric type of the file: it is stored as integers when all its values are integers, otherwise as
+floating point numbers (like the hourly prices of the big provider catalogs).
+"""
+
+# The fields of an offer in the offers files and the names of the arrays where they are stored
+OFFER_FIELDS = {
+    'cpu': 'Cpu',
+    'memory': 'Memory',
+    'storage': 'Storage',
+    'price': 'Price'
+}
+
+# The characters that can separate two values in the offers file
+SEPARATORS = re.compile(r'[\s,]*')
+WHITESPACE = re.compile(r'\s*')
+
+# The type of the operating system field in the binary cache file, after the numeric fields of an offer
+OPERATING_SYSTEM_DTYPE = ('OperatingSystem', 'U32')
+
+
+def get_cache_dtype(integer_fields):
+    """
+    Builds the type of the binary cache file, with the same fields as an offer
+
+    Args:
+        integer_fields: The names of the numeric fields whose values are all integers
+
+    Returns:
+        dtype: A NumPy structured type, where the integer fields are int64 and the other numeric fields are float64
+    """
+    return np.dtype([(name, np.int64 if name in integer_fields else np.float64) for name in OFFER_FIELDS.values()]
+                    + [OPERATING_SYSTEM_DTYPE])
+
+
+def get_frontier(capacities, prices):
+    """
+    Finds the offers that are not dominated: an offer is dominated if there is another offer that comes before it when
+    sorting by price and has at least the same amount of every resource
+
+    Args:
+        capacities: A NumPy array with a row for every offer and a column for every hardware resource
+        prices: A NumPy array with the price of every offer
+
+    Returns:
+        frontier_ids: A list with the positions of the offers that are not dominated, sorted by price
+                      (offers with the same price keep their order)
+    """
+    sorted_ids = np.argsort(prices, kind='stable')
+    sorted_capacities = capacities[sorted_ids]
+    # The offers that are not dominated by any of the frontier offers found so far
+    remaining = np.ones(len(sorted_ids), dtype=bool)
+    frontier_ids = []
+    position = 0
+    while position < len(sorted_ids):
+        # The cheapest remaining offer is on the frontier, and every later offer that it dominates is removed
+        # An offer dominated by a removed offer is also dominated by the frontier offer that removed it
+        position += int(np.argmax(remaining[position:]))
+        if not remaining[position]:
+            break
+        frontier_ids.append(int(sorted_ids[position]))
+        remaining[position:] &= ~np.all(sorted_capacities[position:] <= sorted_capacities[position], axis=1)
+    return frontier_ids
+
+
+def prune_offers(offers_list):
+    """
+    Removes the offers that are dominated by a cheaper one (see get_frontier), they can never be part of the cheapest
+    solution. The kept offers are in the same order as in the given list.
+
+    Args:
+        offers_list: The list of virtual machine offers, as returned by get_offers
+
+    Returns:
+        pruned_offers: The list of offers that are not dominated
+        offer_ids: A list with the position of every kept offer in the given list
+    """
+    capacities = np.array([[offer['Cpu'], offer['Memory'], offer['Storage']] for offer in offers_list],
+                          dtype=np.float64).reshape(len(offers_list), 3)
+    prices = np.array([offer['Price'] for offer in offers_list], dtype=np.float64)
+    offer_ids = sorted(get_frontier(capacities, prices))
+    return [offers_list[offer_id] for offer_id in offer_ids], offer_ids
+
+
+def restore_types(type_array, offer_ids):
+    """
+    Translates a type array that uses the offers of a pruned catalog to the ids of the full catalog
+    The types are counted from 1, as in the MiniZinc models, and 0 (a machine that is not used) is kept as it is
+
+    Args:
+        type_array: The type array obtained with the pruned catalog
+        offer_ids: The position in the full catalog of every offer of the pruned one, as returned by prune_offers
+
+    Returns:
+        type_array: The same type array, with the ids of the full catalog
+    """
+    return [offer_ids[machine_type - 1] + 1 if machine_type > 0 else 0 for machine_type in type_array]
+
+
+def iterate_offers(file, chunk_size=1 << 16):
+    """
+    Reads the offers file one offer at a time, without loading the whole file
+    Both formats are accepted: an object that maps the name of every offer to its fields (like offers_20.json), or
+    a list of offers
+
+    Args:
+        file: The file location
+        chunk_size: The number of characters read from the file at a time
+
+    Yields:
+        offer: A dictionary with the fields of an offer, as found in the file
+    """
+    decoder = json.JSONDecoder()
+    with open(file) as f:
+        buffer = f.read(chunk_size)
+        position = 0
+
+        def skip(pattern):
+            # Moves past the characters matched by the pattern, reading more of the file if needed
+            nonlocal buffer, position
+            while True:
+                position = pattern.match(buffer, position).end()
+                if position < len(buffer):
+                    return buffer[position]
+                buffer, position = f.read(chunk_size), 0
+                if not buffer:
+                    return ''
+
+        def decode():
+            # Decodes the next json value, reading more of the file until the value is complete
+            nonlocal buffer, position
+            while True:
+                try:
+                    value, end = decoder.raw_decode(buffer, position)
+                except json.JSONDecodeError:
+                    more = f.read(chunk_size)
+                    if not more:
+                        raise
+                    buffer, position = buffer[position:] + more, 0
+                    continue
+                position = end
+                return value
+
+        start = skip(WHITESPACE)
+        if start not in ('{', '['):
+            raise ValueError(f"The offers file {file} must contain an object or a list.")
+        keyed = start == '{'
+        position += 1
+        while True:
+            character = skip(SEPARATORS)
+            if character in ('}', ']', ''):
+                return
+            if keyed:
+                decode()
+                if skip(WHITESPACE) != ':':
+                    raise ValueError(f"The offers file {file} is not a valid json object.")
+                position += 1
+                skip(WHITESPACE)
+            yield decode()
+
+
+def parse_offers(file):
+    """
+    Reads all the offers of a file into a NumPy structured array
+
+    Args:
+        file: The file location
+
+    Returns:
+        offers: A NumPy array with a record (Cpu, Memory, Storage, Price, OperatingSystem) for every offer
+                The numeric fields are integers when all their values in the file are integers
+    """
+    columns = {name: array('d') for name in OFFER_FIELDS.values()}
+    integer_fields = set(OFFER_FIELDS.values())
+    operating_systems = []
+    for offer in iterate_offers(file):
+        for field, name in OFFER_FIELDS.items():
+            value = offer[field]
+            if not isinstance(value, int):
+                integer_fields.discard(name)
+            columns[name].append(value)
+        operating_systems.append(offer.get('operatingSystem', ''))
+
+    offers = np.empty(len(operating_systems), dtype=get_cache_dtype(integer_fields))
+    for name, column in columns.items():
+        offers[name] = np.frombuffer(column, dtype=np.float64) if len(column) else 0
+    offers['OperatingSystem'] = operating_systems
+    return offers
+
+
+def load_offers(file, operating_system=None, prune_dominated=False, cache=True):
+    """
+    Loads the offers of a file as NumPy arrays, optionally leaving out the offers that can never be chosen
+    The first time a file is loaded, its offers are saved in a binary cache file (file.npy), which is memory mapped
+    by the next calls, as long as it is newer than the offers file.
+
+    Args:
+        file: The file location
+        operating_system: If it is given, only the offers with this operating system are kept
+        prune_dominated: If it is True, the offers that are dominated by a cheaper one are left out
+        cache: If it is True, the binary cache file is used
+
+    Returns:
+        offers: A dictionary with a NumPy array for every field of the offers (Cpu, Memory, Storage, Price and
+                OperatingSystem) and an 'Id' array with the position of every kept offer in the file
+    """
+    cache_file = f"{file}.npy"
+    if cache and os.path.isfile(cache_file) and os.path.getmtime(cache_file) >= os.path.getmtime(file):
+        records = np.load(cache_file, mmap_mode='r')
+    else:
+        records = parse_offers(file)
+        if cache:
+            # The cache is written to a temporary file first, so a run that is stopped never leaves a broken cache
+            with open(f"{cache_file}.tmp", 'wb') as f:
+                np.save(f, records)
+            os.replace(f"{cache_file}.tmp", cache_file)
+
+    ids = np.arange(len(records))
+    if operating_system is None and not prune_dominated:
+        # Nothing is left out, so the arrays stay in the memory mapped cache file
+        offers = {name: records[name] for name in records.dtype.names}
+        offers['Id'] = ids
+        return offers
+
+    if operating_system is not None:
+        ids = ids[records['OperatingSystem'] == operating_system]
+    if prune_dominated and len(ids):
+        capacities = np.stack([records['Cpu'][ids], records['Memory'][ids], records['Storage'][ids]], axis=1)
+        ids = np.sort(ids[get_frontier(capacities, records['Price'][ids])])
+
+    offers = {name: np.asarray(records[name][ids]) for name in records.dtype.names}
+    offers['Id'] = ids
+    return offers
+
+
+class OfferCatalog(list):
+    """
+    The list of virtual machine offers, together with an index used to find the cheapest offer for some requirements
+    It is still the offers list, so an offer is accessed by its id in the same way (offers_list[offer_id]).
+    The catalog must not be modified after it was built.
+
+    The index keeps only the offers that are not dominated: an offer is dominated if there is another offer that comes
+    before it when sorting by price and has at least the same cpu, memory and storage. A dominated offer can never be
+    the cheapest one that satisfies some requirements, so the answer is the first offer of the index that fits.
+    For every resource the frontier is also sorted by the amount of that resource. A binary search in each order gives
+    the offers with enough of the resource, and only the smallest of these groups is compared with the requirements.
+    """
+
+    def __init__(self, offers_list, resources=('Cpu', 'Memory', 'Storage')):
+        """
+        Args:
+            offers_list: The list of virtual machine offers, as returned by get_offers
+            resources: The hardware resources that are compared when choosing an offer
+        """
+        super().__init__(offers_list)
+        self.resources = list(resources)
+        # The values can be fractional (cpu shares, hourly prices), so they are not cut off to integers
+        capacities = np.array([[offer[resource] for resource in self.resources] for offer in self],
+                              dtype=np.float64).reshape(len(self), len(self.resources))
+        prices = np.array([offer['Price'] for offer in self], dtype=np.float64)
+        self.frontier_ids = get_frontier(capacities, prices)
+        self.frontier_capacities = capacities[self.frontier_ids]
+        # For every resource, the frontier positions sorted by the amount of the resource, and the sorted amounts
+        self.resource_orders = [np.argsort(self.frontier_capacities[:, index], kind='stable')
+                                for index in range(len(self.resources))]
+        self.resource_amounts = [self.frontier_capacities[order, index]
+                                 for index, order in enumerate(self.resource_orders)]
+        # Most of the new machines host the same few component combinations, so the answers are remembered
+        self.cache = {}
+
+    def cheapest_fit(self, requirements):
+        """
+        Finds the cheapest offer that has at least the given amount of every resource
+        If more offers have the lowest price, the first one from the offers list is returned
+
+        Args:
+            requirements: A dictionary with the needed amount of every resource (for example {'Cpu': 2, ...})
+
+        Returns:
+            offer_id: The index of the chosen offer in the offers list, or -1 if no offer satisfies the requirements
+        """
+        key = tuple(requirements[resource] for resource in self.resources)
+        if key not in self.cache:
+            # The offers with enough of a resource are at the end of its order, we keep the resource with the fewest
+            starts = [int(np.searchsorted(amounts, amount)) for amounts, amount in zip(self.resource_amounts, key)]
+            index = int(np.argmax(starts))
+            candidates = self.resource_orders[index][starts[index]:]
+            fits = candidates[np.all(self.frontier_capacities[candidates] >= key, axis=1)]
+            # The frontier is sorted by price, so the cheapest offer is the one with the lowest position
+            self.cache[key] = self.frontier_ids[int(fits.min())] if len(fits) else -1
+        return self.cache[key]
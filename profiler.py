@@ -0,0 +1,116 @@
+import json
+import os
+import time
+from functools import wraps
+
+"""
+This file contains the instrumentation used to find out where the greedy algorithms spend their time.
+It is enabled by setting the GREEDY_PROFILE environment variable to 1 (or by calling enable()).
+For every instrumented function we count the calls and add up the time spent in them, and for every iteration of the
+loop that fixes the false constraints we keep the number of false constraints and the time it took.
+When it is disabled, an instrumented function only checks a flag before calling the original one.
+"""
+
+ENABLED = os.environ.get('GREEDY_PROFILE', '0') not in ('', '0')
+
+# For every instrumented name, a list [number of calls, total time in seconds]
+CALLS = {}
+# For every iteration of the fix-up loop, a tuple (number of false constraints, time in seconds)
+ITERATIONS = []
+
+
+def enable(enabled=True):
+    """
+    Turns the instrumentation on or off, the collected measurements are kept
+
+    Args:
+        enabled: A boolean value that is True if the measurements should be collected
+    """
+    global ENABLED
+    ENABLED = enabled
+
+
+def reset():
+    """
+    Removes all the collected measurements, it is called before every run
+    """
+    CALLS.clear()
+    ITERATIONS.clear()
+
+
+def record(name, run_time):
+    """
+    Adds a call of the given name to the measurements
+
+    Args:
+        name: The name under which the call is counted
+        run_time: The time spent in the call, in seconds
+    """
+    calls = CALLS.get(name)
+    if calls is None:
+        CALLS[name] = [1, run_time]
+    else:
+        calls[0] += 1
+        calls[1] += run_time
+
+
+def record_iteration(false_constraints_number, run_time):
+    """
+    Adds an iteration of the fix-up loop to the measurements
+
+    Args:
+        false_constraints_number: The number of false constraints that were handled in the iteration
+        run_time: The time spent handling them and checking the constraints again, in seconds
+    """
+    ITERATIONS.append((false_constraints_number, run_time))
+
+
+def profiled(name, key=None):
+    """
+    Decorator that counts the calls of a function and the time spent in it, while the instrumentation is enabled
+
+    Args:
+        name: The name under which the calls are counted
+        key: A function that receives the arguments of the call and returns a detail added to the name
+             (for example the type of the constraint that is checked)
+    """
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return function(*args, **kwargs)
+            start_time = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                run_time = time.perf_counter() - start_time
+                record(name if key is None else f"{name} {key(*args, **kwargs)}", run_time)
+        return wrapper
+    return decorator
+
+
+def get_report():
+    """
+    Returns:
+        report: A dictionary with the measurements collected since the last reset, or None if the instrumentation
+                is disabled
+    """
+    if not ENABLED:
+        return None
+    return {
+        'calls': {name: {'calls': calls, 'time': run_time} for name, (calls, run_time) in sorted(CALLS.items())},
+        'iterations': [{'false_constraints': false_constraints_number, 'time': run_time}
+                       for false_constraints_number, run_time in ITERATIONS]
+    }
+
+
+def write_report(output_file, report):
+    """
+    Writes a report as a json file next to the csv output file of the same run (X.csv -> X_profile.json)
+
+    Args:
+        output_file: The path to the csv output file
+        report: The report returned by get_report
+    """
+    with open(output_file.replace('.csv', '_profile.json'), 'w') as f:
+        json.dump(report, f, indent=2)
@@ -1,10 +1,19 @@
-from minizinc import Instance, Model, Solver
-from datetime import timedelta
+from minizinc import Instance, Model, Result, Solver, Status
+from datetime import datetime, timedelta
+import asyncio
 import csv
 import time
 import os
 import json
 
+import main
+from dzn import assign_dzn_data, get_dzn_data, write_dzn
+from minizinc_cache import get_cache_key, load_result, save_result
+from mzn import write_models
+from offer_catalog import load_offers, restore_types
+from lower_bound import get_instance_lower_bounds
+from surrogate import SURROGATE_REGISTRY
+
 """
 This file is used to access the MiniZinc Python Interface.
 Using it we solve every possible instance of our problem: WordpressN_OffersVMNR
@@ -12,45 +21,204 @@ For every N in [3,4,...,12] and VMNR in [20, 40, 250, 500]
 
 """
 
+# The suffix of the models with symmetry breaking and redundant constraints (Models\\Wordpress_Symmetry.mzn)
+SYMMETRY_SUFFIX = "_Symmetry"
+
+
+def get_model_name(model_path):
+    """
+    This function returns the name of a model, used in the names of the output files
+    For ex: Models\\Wordpress.mzn and Models\\Generated\\Wordpress.mzn are both named Wordpress
+
+    Args:
+       model_path: The path to the location of the MiniZinc model file
+
+    Returns:
+        model_name: The name of the model file, without the directory and the extension
+    """
+    return model_path.split('\\')[-1].replace('.mzn', '')
+
+
+def get_problem_name(model_path):
+    """
+    This function returns the name of the problem solved by a model, used to find its input files
+    For ex: Models\\Wordpress.mzn and Models\\Wordpress_Symmetry.mzn both solve the Wordpress problem
+
+    Args:
+       model_path: The path to the location of the MiniZinc model file
 
-def get_min_machine_number(file, component_number):
+    Returns:
+        problem_name: The name of the problem
+    """
+    return get_model_name(model_path).replace(SYMMETRY_SUFFIX, '')
+
+
+def get_min_machine_number(problem_name, component_number):
     """
     This function returns the mapping between the number of components deployed and the max machine number
     For ex: 3 wordpress -> max 8 machines, 4 wordpress -> max 10 machines, in our case 3 and 4 are "component_number"
+    The surrogate table of the problem is read only once, and the missing values are computed when they are needed
 
     Args:
-       file: The path to the file that contains the mapping
+       problem_name: The name of the problem, used to find the surrogate table
        component_number: The number of component instances to which we need to find the mapping
 
     Returns:
         value: Integer value that represents the maximum number of virtual machines that can be deployed, if we know
                the number of components that are already deployed
     """
-    with open(file, 'r') as f:
-        content = csv.DictReader(f)
-        # Since the content of the csv file depends on what problem we solve, we want to extract the problem name
-        # In this convention, we do that by removing the _surrogate.csv part and also the directory header
-        application_name = file.replace('_Surrogate.csv', '').lower()
-        application_name = application_name.replace('surrogate\\', '')
-        # We go through the csv file and if we find the number received as parameter we can return it's mapping
-        for row in content:
-            if row[f'{application_name}_instances'] == str(component_number):
-                return int(row['vm_number'])
+    return SURROGATE_REGISTRY.get_machine_number(problem_name, component_number)
 
 
-def solve_model_minizinc(model_path, problem_instances_number, solver, offers_number):
+def get_greedy_solution(model_path, problem_instances_number, offers_number, component_to_add=0):
     """
-    This function is used to solve the model given as parameter, using the specified solver.
+    This function finds a solution with the greedy algorithms, its price is used as an upper bound for the objective
+    of the exact model and its number of machines as a bound for M.
+    We start from the MiniZinc solution with the closest smaller number of instances and deploy the component until
+    we have 'problem_instances_number' instances of it. The cheapest of the two greedy solutions is used.
+
+    Args:
+      model_path: The path to the location of the MiniZinc model file
+      problem_instances_number: The minimum number of main component that will be deployed
+      offers_number: The number of offers that is used for this particular solution
+      component_to_add: The id of the main component, as used in the greedy algorithms
+
+    Returns:
+       solution: The cheapest greedy solution (a dictionary with the assignment matrix, the type array, the price
+                 array and the greedy input file it was found from) or None if there is no solution to start from
+    """
+    problem_name = get_problem_name(model_path)
+    for initial_number in range(problem_instances_number - 1, 0, -1):
+        minizinc_solution = f"Input\\Greedy_Input\\{problem_name}{initial_number}_Offers{offers_number}_Input.json"
+        if os.path.exists(minizinc_solution):
+            break
+    else:
+        return None
+
+    solutions = []
+    for greedy_type in ["min_vm", "distinct_vm"]:
+        result = main.get_greedy_solution(f"Input\\Problem_Description\\{problem_name}.json",
+                                          f"Input\\Offers\\offers_{offers_number}.json",
+                                          minizinc_solution, component_to_add, problem_instances_number, greedy_type)
+        # If the result is a string the greedy algorithm could not solve the problem
+        if type(result) != str:
+            # The input file depends on the runs that were already finished, so it is written with the results
+            result['Greedy Input'] = minizinc_solution
+            solutions.append(result)
+    return min(solutions, key=lambda solution: sum(solution['Price Array'])) if solutions else None
+
+
+def get_greedy_solution_async(model_path, problem_instances_number, offers_number, greedy_solutions=None):
+    """
+    This function computes the greedy solution of get_greedy_solution in a separate thread, so the solvers that are
+    already running are not blocked while it is computed.
+    The solves of the same problem share it through 'greedy_solutions', so it is computed only once for every
+    (instances, offers) combination, whatever the number of solvers.
+
+    Args:
+      model_path: The path to the location of the MiniZinc model file
+      problem_instances_number: The minimum number of main component that will be deployed
+      offers_number: The number of offers that is used for this particular solution
+      greedy_solutions: A dictionary shared by the solves, with the greedy solution of every problem already started
+
+    Returns:
+       future: A future with the result of get_greedy_solution
+    """
+    if greedy_solutions is None:
+        greedy_solutions = {}
+    key = (model_path, problem_instances_number, offers_number)
+    if key not in greedy_solutions:
+        greedy_solutions[key] = asyncio.get_running_loop().run_in_executor(
+            None, get_greedy_solution, model_path, problem_instances_number, offers_number
+        )
+    return greedy_solutions[key]
+
+
+def get_machine_bound(model_path, problem_instances_number, greedy_solution=None):
+    """
+    This function chooses the value of M, the number of machines (columns of the assignment matrix) of the model.
+    The surrogate value is an upper bound for any problem, but the greedy solution usually needs fewer machines, and
+    every machine less removes a column of variables and many symmetric solutions.
+    With the greedy value the model is still satisfiable (the greedy solution fits in it), but a cheaper solution
+    with more machines than the greedy one can't be found, so the bound that was used is written in the output.
+
+    Args:
+      model_path: The path to the location of the MiniZinc model file
+      problem_instances_number: The minimum number of main component that will be deployed
+      greedy_solution: The greedy solution returned by get_greedy_solution, if it is None the surrogate value is used
+
+    Returns:
+       machines_number: The value of M
+       bound_source: The name of the bound that was used, "surrogate" or "greedy"
+       greedy_input: The greedy input file of the greedy solution, or None if there is no greedy solution
+    """
+    machines_number = get_min_machine_number(get_problem_name(model_path), problem_instances_number)
+    if greedy_solution is None:
+        return machines_number, "surrogate", None
+    # The columns of the MiniZinc solution that are not used are also in the greedy assignment matrix
+    greedy_machines_number = sum(any(column) for column in zip(*greedy_solution['Assignment Matrix']))
+    if greedy_machines_number < machines_number:
+        return greedy_machines_number, "greedy", greedy_solution['Greedy Input']
+    return machines_number, "surrogate", greedy_solution['Greedy Input']
+
+
+# The position in the offers file of every offer that is left after pruning, computed once for every offers file
+PRUNED_OFFER_IDS = {}
+
+
+def get_pruned_offer_ids(offers_number):
+    """
+    This function returns the ids of the offers that are not dominated, they are computed only once for every offers
+    file, so translating the intermediate solutions of the anytime mode doesn't prune the offers again
+
+    Args:
+      offers_number: The number of offers of the offers file
+
+    Returns:
+       offer_ids: A list with the position in the offers file of every offer of the pruned catalog
+    """
+    if offers_number not in PRUNED_OFFER_IDS:
+        PRUNED_OFFER_IDS[offers_number] = load_offers(f"Input\\Offers\\offers_{offers_number}.json",
+                                                      prune_dominated=True)['Id'].tolist()
+    return PRUNED_OFFER_IDS[offers_number]
+
+
+def get_type_array(model_path, offers_number, type_array, pruned):
+    """
+    This function returns the type array of a solution with the ids of the full offers file
+
+    Args:
+      model_path: The path to the location of the MiniZinc model file
+      offers_number: The number of offers that is used for this particular solution
+      type_array: The type array found by the solver
+      pruned: If it is True, the solution was found with the pruned offers, so the types are translated
+
+    Returns:
+       type_array: The type array, with the ids of the offers file
+    """
+    if not pruned:
+        return type_array
+    return restore_types(type_array, get_pruned_offer_ids(offers_number))
+
+
+def create_instance(model_path, problem_instances_number, solver, offers_number, upper_bound=None, pruned=False,
+                    in_memory=False, machines_number=None):
+    """
+    This function builds the MiniZinc instance of the model given as parameter, using the specified solver.
 
     Args:
       model_path: The path to the location of the MiniZinc model file
       problem_instances_number: The minimum number of main component that will be deployed
       solver: The name of the solver that will be used to find the solution
       offers_number: The number of offers that is used for this particular solution
+      upper_bound: If it is given, only the solutions with a total price at most equal to it are searched
+      pruned: If it is True, the offers that are dominated by a cheaper one are left out
+              The types of the solution must then be translated with get_type_array
+      in_memory: If it is True, the data is assigned directly to the instance instead of using a DZN file
+      machines_number: The value of M, if it is None the value of the surrogate problem is used
 
     Returns:
-       result: A MiniZinc object, that contains the result of the model given as parameter
-       runtime: Integer value that represents the runtime of the model, in seconds
+       instance: A MiniZinc instance, with all the input data assigned
     """
     # Load the model from the corresponding file
     model = Model(model_path)
@@ -58,22 +226,427 @@ def solve_model_minizinc(model_path, problem_instances_number, solver, offers_nu
     solver = Solver.lookup(solver)
     # Create an instance of the problem using the previous solver
     instance = Instance(solver, model)
-    # Links the corresponding dzn file to the model
-    model_path = model_path.replace('Models\\', '')
-    instance.add_file(f"Input\\DZN_Files\\{model_path.replace('.mzn', '')}_Offers{offers_number}.dzn")
+    problem_name = get_problem_name(model_path)
+    problem_file = f"Input\\Problem_Description\\{problem_name}.json"
+    offers_file = f"Input\\Offers\\offers_{offers_number}.json"
+    if in_memory:
+        assign_dzn_data(instance, problem_file, offers_file, pruned)
+    else:
+        # Links the corresponding dzn file to the model, it is generated if it is missing or older than the inputs
+        # The generated files are kept apart from the hand-written ones of Input\DZN_Files
+        dzn_file = f"Input\\DZN_Files\\Generated\\{problem_name}_Offers{offers_number}" \
+                   f"{'_Pruned' if pruned else ''}.dzn"
+        write_dzn(problem_file, offers_file, dzn_file, pruned)
+        instance.add_file(dzn_file)
     # Assign the number of wordpress instances and the minimum machines number
-    instance["M"] = get_min_machine_number(
-        f"Surrogate\\{model_path.replace('.mzn', '')}_Surrogate.csv",
-        problem_instances_number
-    )
+    if machines_number is None:
+        machines_number = get_min_machine_number(problem_name, problem_instances_number)
+    instance["M"] = machines_number
     instance["WP"] = problem_instances_number
+    # The model with symmetry breaking also needs the number of instances of every component from the surrogate
+    if model_path.endswith(f"{SYMMETRY_SUFFIX}.mzn"):
+        instance["minInstances"] = get_instance_lower_bounds(problem_file, 0, problem_instances_number)
+    # With a known solution price, the solver can prune every branch that is more expensive from the start
+    if upper_bound is not None:
+        instance.add_string(f"constraint sum(p in price)(p) <= {upper_bound};")
+    return instance
+
+
+def get_solve_key(model_path, problem_instances_number, solver, offers_number, pruned=False, machines_number=None):
+    """
+    This function computes the key under which the result of a solve is kept in the cache.
+    It depends on the model, the data of the problem, the M and WP parameters and the solver with its version.
+
+    Args:
+      model_path: The path to the location of the MiniZinc model file
+      problem_instances_number: The minimum number of main component that will be deployed
+      solver: The name of the solver that will be used to find the solution
+      offers_number: The number of offers that is used for this particular solution
+      pruned: If it is True, the offers that are dominated by a cheaper one are left out
+      machines_number: The value of M, if it is None the value of the surrogate problem is used
+
+    Returns:
+       key: A string that identifies the solve in the cache
+    """
+    problem_name = get_problem_name(model_path)
+    data, _ = get_dzn_data(f"Input\\Problem_Description\\{problem_name}.json",
+                           f"Input\\Offers\\offers_{offers_number}.json", pruned)
+    if machines_number is None:
+        machines_number = get_min_machine_number(problem_name, problem_instances_number)
+    parameters = {
+        'M': machines_number,
+        'WP': problem_instances_number
+    }
+    return get_cache_key(model_path, data, parameters, Solver.lookup(solver))
+
+
+def solve_model_minizinc(model_path, problem_instances_number, solver, offers_number, greedy_bound=False,
+                         pruned=False, in_memory=False, greedy_machines=False):
+    """
+    This function is used to solve the model given as parameter, using the specified solver.
+
+    Args:
+      model_path: The path to the location of the MiniZinc model file
+      problem_instances_number: The minimum number of main component that will be deployed
+      solver: The name of the solver that will be used to find the solution
+      offers_number: The number of offers that is used for this particular solution
+      greedy_bound: If it is True, the price of a greedy solution is used as an upper bound for the objective
+      pruned: If it is True, the offers that are dominated by a cheaper one are left out
+      in_memory: If it is True, the data is assigned directly to the instance instead of using a DZN file
+      greedy_machines: If it is True, the number of machines of a greedy solution is used as M when it is smaller
+
+    Returns:
+       result: A MiniZinc object, that contains the result of the model given as parameter
+       runtime: Integer value that represents the runtime of the model, in seconds
+       machine_bound: A tuple with the value of M, the name of the bound it comes from and the greedy input used for
+                      the bounds (see get_machine_bound)
+    """
     start_time = time.time()
+    # The greedy solution is needed before the cache lookup only when it gives the value of M
+    greedy_solution = get_greedy_solution(model_path, problem_instances_number, offers_number) \
+        if greedy_machines else None
+    machine_bound = get_machine_bound(model_path, problem_instances_number, greedy_solution)
+    # If the same problem was already solved to optimality, the result is taken from the cache
+    cache_key = get_solve_key(model_path, problem_instances_number, solver, offers_number, pruned, machine_bound[0])
+    cached_result = load_result(cache_key)
+    if cached_result is not None:
+        return (*cached_result, machine_bound)
+    if greedy_bound and not greedy_machines:
+        greedy_solution = get_greedy_solution(model_path, problem_instances_number, offers_number)
+        if greedy_solution is not None:
+            machine_bound = (*machine_bound[:2], greedy_solution['Greedy Input'])
+    upper_bound = sum(greedy_solution['Price Array']) if greedy_bound and greedy_solution is not None else None
+    instance = create_instance(model_path, problem_instances_number, solver, offers_number, upper_bound, pruned,
+                               in_memory, machine_bound[0])
     result = instance.solve(timeout=timedelta(milliseconds=2400000))
+    # The greedy solution may not fit the model (for example it needs more machines than M)
+    # In that case the bounds make the model unsatisfiable and we have to solve it again without them
+    if greedy_solution is not None and result.status == Status.UNSATISFIABLE:
+        machine_bound = get_machine_bound(model_path, problem_instances_number)
+        cache_key = get_solve_key(model_path, problem_instances_number, solver, offers_number, pruned)
+        instance = create_instance(model_path, problem_instances_number, solver, offers_number, pruned=pruned,
+                                   in_memory=in_memory)
+        result = instance.solve(timeout=timedelta(milliseconds=2400000))
     run_time = time.time() - start_time
-    return result, run_time
+    save_result(cache_key, result, run_time)
+    return result, run_time, machine_bound
 
 
-def write_output(model_path, component_number, offer_number, price_array, run_time, solver):
+async def solve_instance_anytime(instance, timeout, on_solution):
+    """
+    This function solves an instance and passes every intermediate solution to 'on_solution' as soon as it is found,
+    so the solutions found before the time limit (or before the solve is cancelled) are not lost.
+
+    Args:
+      instance: The MiniZinc instance that is solved
+      timeout: The time after which the solver stops and returns the best solution found so far
+      on_solution: A function that receives the MiniZinc result of every intermediate solution
+
+    Returns:
+       result: A MiniZinc object with the final status and the best solution found
+    """
+    status = Status.UNKNOWN
+    solution = None
+    statistics = {}
+    async for result in instance.solutions(timeout=timeout, intermediate_solutions=True):
+        status = result.status
+        statistics.update(result.statistics)
+        # The last result only has the final status and statistics, the solutions come before it
+        if result.solution is not None:
+            solution = result.solution
+            on_solution(result)
+    return Result(status, solution, statistics)
+
+
+async def solve_model_minizinc_async(model_path, problem_instances_number, solver, offers_number,
+                                     timeout=timedelta(milliseconds=2400000), greedy_bound=False, pruned=False,
+                                     in_memory=False, greedy_machines=False, anytime=False, greedy_solutions=None):
+    """
+    This function is the asynchronous version of solve_model_minizinc, so more models can be solved at the same time.
+    In anytime mode, every improving solution is written as soon as it is found (see write_anytime_solution).
+
+    Args:
+      model_path: The path to the location of the MiniZinc model file
+      problem_instances_number: The minimum number of main component that will be deployed
+      solver: The name of the solver that will be used to find the solution
+      offers_number: The number of offers that is used for this particular solution
+      timeout: The time after which the solver stops and returns the best solution found so far
+      greedy_bound: If it is True, the price of a greedy solution is used as an upper bound for the objective
+      pruned: If it is True, the offers that are dominated by a cheaper one are left out
+      in_memory: If it is True, the data is assigned directly to the instance instead of using a DZN file
+      greedy_machines: If it is True, the number of machines of a greedy solution is used as M when it is smaller
+      anytime: If it is True, the intermediate solutions are written to disk while the solver runs
+      greedy_solutions: A dictionary shared by the solves of the same problems, so their greedy solution is computed
+                        only once (see get_greedy_solution_async)
+
+    Returns:
+       result: A MiniZinc object, that contains the result of the model given as parameter
+       runtime: Integer value that represents the runtime of the model, in seconds
+       machine_bound: A tuple with the value of M, the name of the bound it comes from and the greedy input used for
+                      the bounds (see get_machine_bound)
+    """
+    start_time = time.time()
+    # The greedy solution is needed before the cache lookup only when it gives the value of M
+    greedy_solution = await get_greedy_solution_async(model_path, problem_instances_number, offers_number,
+                                                      greedy_solutions) if greedy_machines else None
+    machine_bound = get_machine_bound(model_path, problem_instances_number, greedy_solution)
+    # If the same problem was already solved to optimality, the result is taken from the cache
+    cache_key = get_solve_key(model_path, problem_instances_number, solver, offers_number, pruned, machine_bound[0])
+    cached_result = load_result(cache_key)
+    if cached_result is not None:
+        return (*cached_result, machine_bound)
+    if greedy_bound and not greedy_machines:
+        greedy_solution = await get_greedy_solution_async(model_path, problem_instances_number, offers_number,
+                                                          greedy_solutions)
+        if greedy_solution is not None:
+            machine_bound = (*machine_bound[:2], greedy_solution['Greedy Input'])
+    upper_bound = sum(greedy_solution['Price Array']) if greedy_bound and greedy_solution is not None else None
+    instance = create_instance(model_path, problem_instances_number, solver, offers_number, upper_bound, pruned,
+                               in_memory, machine_bound[0])
+    solutions_number = 0
+
+    def on_solution(intermediate_result):
+        nonlocal solutions_number
+        write_anytime_solution(model_path, problem_instances_number, offers_number, intermediate_result, solver,
+                               time.time() - start_time, solutions_number == 0, pruned)
+        solutions_number += 1
+
+    async def solve(instance):
+        if anytime:
+            return await solve_instance_anytime(instance, timeout, on_solution)
+        return await instance.solve_async(timeout=timeout)
+
+    result = await solve(instance)
+    # The greedy solution may not fit the model, see solve_model_minizinc
+    if greedy_solution is not None and result.status == Status.UNSATISFIABLE:
+        machine_bound = get_machine_bound(model_path, problem_instances_number)
+        cache_key = get_solve_key(model_path, problem_instances_number, solver, offers_number, pruned)
+        instance = create_instance(model_path, problem_instances_number, solver, offers_number, pruned=pruned,
+                                   in_memory=in_memory)
+        result = await solve(instance)
+    run_time = time.time() - start_time
+    save_result(cache_key, result, run_time)
+    return result, run_time, machine_bound
+
+
+def get_cancelled_jobs(jobs, solver, component_number, offer_number):
+    """
+    This function applies the time limit policy: it returns the jobs that are no longer needed after the job
+    (solver, component_number, offer_number) went over the time limit.
+    If a run with 20 offers goes over the time limit there is no purpose to test more instances with that solver.
+    If a run with more offers goes over the limit, the runs with even more offers for the same instances will too.
+
+    Args:
+      jobs: A dictionary that maps every (solver, component_number, offer_number) job to its task
+      solver: The name of the solver of the job that went over the time limit
+      component_number: The minimum number of main component of the job that went over the time limit
+      offer_number: The number of offers of the job that went over the time limit
+
+    Returns:
+       cancelled_jobs: A list with the (solver, component_number, offer_number) jobs that can be cancelled
+    """
+    cancelled_jobs = []
+    for job_solver, job_component_number, job_offer_number in jobs:
+        if job_solver != solver:
+            continue
+        if job_component_number == component_number and job_offer_number > offer_number:
+            cancelled_jobs.append((job_solver, job_component_number, job_offer_number))
+        elif job_component_number > component_number and offer_number == 20:
+            cancelled_jobs.append((job_solver, job_component_number, job_offer_number))
+    return cancelled_jobs
+
+
+async def solve_all_minizinc(model_path, solvers, offers_numbers, lower_bound, upper_bound, time_limit, workers,
+                             greedy_bound=False, pruned=False, in_memory=False, greedy_machines=False,
+                             anytime=False):
+    """
+    This function solves every (solver, instances, offers) combination, running at most 'workers' solvers at once.
+    The results are written as soon as a run is finished.
+    Every run is stopped by the solver when it reaches the time limit. When a run goes over the time limit, the runs
+    that would go over it too are cancelled (see get_cancelled_jobs).
+    In anytime mode, the best solution found by a run that goes over the time limit is written too.
+    A run that fails (for example because its solver is not installed) is skipped, the other runs go on.
+
+    Args:
+      model_path: The path to the location of the MiniZinc model file
+      solvers: A list with the names of the solvers that are used
+      offers_numbers: A list with the numbers of offers that are used
+      lower_bound: The first number of main component instances
+      upper_bound: The number of main component instances where we stop (it is not included)
+      time_limit: The time limit, in seconds, for each problem
+      workers: The maximum number of problems that are solved at the same time
+      greedy_bound: If it is True, the price of a greedy solution is used as an upper bound for the objective
+      pruned: If it is True, the offers that are dominated by a cheaper one are left out
+      in_memory: If it is True, the data is assigned directly to the instances instead of using DZN files
+      greedy_machines: If it is True, the number of machines of a greedy solution is used as M when it is smaller
+      anytime: If it is True, the intermediate solutions are written to disk while the solvers run
+    """
+    semaphore = asyncio.Semaphore(workers)
+    # The solvers of the same problem share its greedy solution
+    greedy_solutions = {}
+
+    async def solve_job(solver, component_number, offer_number):
+        async with semaphore:
+            return await solve_model_minizinc_async(model_path, component_number, solver, offer_number,
+                                                    timedelta(seconds=time_limit), greedy_bound=greedy_bound,
+                                                    pruned=pruned, in_memory=in_memory,
+                                                    greedy_machines=greedy_machines, anytime=anytime,
+                                                    greedy_solutions=greedy_solutions)
+
+    # The jobs are started in this order, so the small instances of every solver are solved first
+    # That way we know as soon as possible which of the bigger ones can be cancelled
+    jobs = {}
+    for component_number in range(lower_bound, upper_bound):
+        for offer_number in offers_numbers:
+            for solver in solvers:
+                jobs[(solver, component_number, offer_number)] = asyncio.ensure_future(
+                    solve_job(solver, component_number, offer_number)
+                )
+    job_names = {task: job for job, task in jobs.items()}
+
+    pending = set(jobs.values())
+    while pending:
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            if task.cancelled():
+                continue
+            solver, component_number, offer_number = job_names[task]
+            try:
+                output, runtime, machine_bound = task.result()
+            except Exception as error:
+                print(f"{solver} failed on {get_model_name(model_path)}{component_number}_Offers{offer_number}: "
+                      f"{error}")
+                continue
+            # A run that was stopped by the time limit has no final status
+            if runtime >= time_limit or output.status not in (Status.OPTIMAL_SOLUTION, Status.UNSATISFIABLE):
+                for job in get_cancelled_jobs(jobs, solver, component_number, offer_number):
+                    jobs[job].cancel()
+                if not anytime:
+                    continue
+            # An unsatisfiable problem (or a run stopped before its first solution) has nothing to write
+            if not output.status.has_solution():
+                continue
+            write_output(model_path, component_number, offer_number, output['price'], runtime, solver, machine_bound,
+                         output.status)
+            # A solution that is not proven optimal must not replace a cheaper one (found by another solver)
+            write_input = create_greedy_input if output.status == Status.OPTIMAL_SOLUTION else update_greedy_input
+            write_input(model_path, component_number, offer_number, output['a'], output['price'],
+                        get_type_array(model_path, offer_number, output['t'], pruned))
+
+
+async def solve_portfolio_minizinc(model_path, problem_instances_number, solvers, offers_number, time_limit,
+                                   greedy_bound=False, pruned=False, in_memory=False, greedy_machines=False,
+                                   anytime=False):
+    """
+    This function solves the same instance with all the given solvers at the same time.
+    The first solver that proves its solution is optimal wins, and the other ones are cancelled.
+    If no solver proves optimality before the time limit, the best solution found by any of them is returned.
+    A solver that fails (for example because it is not installed) counts as a solver without a solution.
+
+    Args:
+      model_path: The path to the location of the MiniZinc model file
+      problem_instances_number: The minimum number of main component that will be deployed
+      solvers: A list with the names of the solvers that are used
+      offers_number: The number of offers that is used for this particular solution
+      time_limit: The time limit, in seconds, after which every solver returns its best solution
+      greedy_bound: If it is True, the price of a greedy solution is used as an upper bound for the objective
+      pruned: If it is True, the offers that are dominated by a cheaper one are left out
+      in_memory: If it is True, the data is assigned directly to the instance instead of using a DZN file
+      greedy_machines: If it is True, the number of machines of a greedy solution is used as M when it is smaller
+      anytime: If it is True, the intermediate solutions of every solver are written to disk while it runs
+
+    Returns:
+       result: A MiniZinc object with the best result, or None if no solver found a solution
+       runtime: Integer value that represents the runtime of the portfolio, in seconds
+       winner: The name of the solver that found the returned result, or None if there is no result
+       machine_bound: The value of M used for the returned result and the bound it comes from, or None
+    """
+    start_time = time.time()
+    # The solvers share the greedy solution, so it is computed once (by the first solver that needs it)
+    greedy_solutions = {}
+    tasks = {
+        asyncio.ensure_future(solve_model_minizinc_async(model_path, problem_instances_number, solver, offers_number,
+                                                         timedelta(seconds=time_limit), greedy_bound, pruned,
+                                                         in_memory, greedy_machines, anytime,
+                                                         greedy_solutions)): solver
+        for solver in solvers
+    }
+    best_result = None
+    winner = None
+    best_machine_bound = None
+    pending = set(tasks)
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                try:
+                    result, _, machine_bound = task.result()
+                except Exception as error:
+                    print(f"{tasks[task]} failed on {get_model_name(model_path)}{problem_instances_number}"
+                          f"_Offers{offers_number}: {error}")
+                    continue
+                if not result.status.has_solution():
+                    continue
+                if result.status == Status.OPTIMAL_SOLUTION:
+                    return result, time.time() - start_time, tasks[task], machine_bound
+                # Until a solver proves optimality we keep the cheapest solution
+                if best_result is None or result.objective < best_result.objective:
+                    best_result = result
+                    winner = tasks[task]
+                    best_machine_bound = machine_bound
+    finally:
+        # We wait for the cancelled solvers to stop, so they don't slow down the next problem
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+    return best_result, time.time() - start_time, winner, best_machine_bound
+
+
+async def solve_all_portfolio(model_path, solvers, offers_numbers, lower_bound, upper_bound, time_limit,
+                              greedy_bound=False, pruned=False, in_memory=False, greedy_machines=False,
+                              anytime=False):
+    """
+    This function solves every (instances, offers) combination with a portfolio of solvers (see
+    solve_portfolio_minizinc). The results are written in the "portfolio" output directory and the winning solver of
+    every instance is recorded, so we can see which solver is the best for each problem size.
+    When a run does not prove optimality, the runs with more offers for the same instances are skipped and,
+    if it was a run with 20 offers, we stop.
+
+    Args:
+      model_path: The path to the location of the MiniZinc model file
+      solvers: A list with the names of the solvers that are used
+      offers_numbers: A list with the numbers of offers that are used
+      lower_bound: The first number of main component instances
+      upper_bound: The number of main component instances where we stop (it is not included)
+      time_limit: The time limit, in seconds, for each problem
+      greedy_bound: If it is True, the price of a greedy solution is used as an upper bound for the objective
+      pruned: If it is True, the offers that are dominated by a cheaper one are left out
+      in_memory: If it is True, the data is assigned directly to the instances instead of using DZN files
+      greedy_machines: If it is True, the number of machines of a greedy solution is used as M when it is smaller
+      anytime: If it is True, the intermediate solutions are written to disk while the solvers run
+    """
+    for component_number in range(lower_bound, upper_bound):
+        for offer_number in offers_numbers:
+            output, runtime, winner, machine_bound = await solve_portfolio_minizinc(
+                model_path, component_number, solvers, offer_number, time_limit, greedy_bound, pruned, in_memory,
+                greedy_machines, anytime
+            )
+            if output is not None:
+                write_output(model_path, component_number, offer_number, output['price'], runtime, "portfolio",
+                             machine_bound, output.status)
+                write_input = create_greedy_input if output.status == Status.OPTIMAL_SOLUTION \
+                    else update_greedy_input
+                write_input(model_path, component_number, offer_number, output['a'], output['price'],
+                            get_type_array(model_path, offer_number, output['t'], pruned))
+                write_portfolio_winner(model_path, component_number, offer_number, winner, output.status, runtime)
+            if output is None or output.status != Status.OPTIMAL_SOLUTION:
+                if offer_number == 20:
+                    return
+                break
+
+
+def write_output(model_path, component_number, offer_number, price_array, run_time, solver, machine_bound=None,
+                 status=None):
     """
     This function writes to a csv file the output of our problem.
     We are interested to output the price array, the minimum price value and the runtime.
@@ -85,18 +658,86 @@ def write_output(model_path, component_number, offer_number, price_array, run_ti
       price_array: The price array that corresponds to the given model
       run_time: Integer value that represents the runtime of the model, in seconds
       solver: The name of the solver that will be used to find the solution
+      machine_bound: The value of M, the name of the bound it comes from and the greedy input used for the bounds, as
+                     returned by get_machine_bound
+      status: The MiniZinc status of the solution, so a solution found before the time limit can be told apart from
+              a proven optimum
     """
     create_directory(f"Output\\MiniZinc_Output\\{solver}")
-    model_path = model_path.replace('Models\\', '')
-    file = f"Output\\MiniZinc_Output\\{solver}\\{model_path.replace('.mzn', '')}" \
+    file = f"Output\\MiniZinc_Output\\{solver}\\{get_model_name(model_path)}" \
            f"{component_number}_Offers{offer_number}_{solver}.csv"
     with open(file, mode='w', newline='') as f:
         fieldnames = ['Price min value', 'Price for each machine', 'Time']
+        row = {'Price min value': sum(price_array), 'Price for each machine': price_array, 'Time': run_time}
+        if machine_bound is not None:
+            fieldnames += ['Machines bound', 'Bound source', 'Greedy input']
+            row['Machines bound'], row['Bound source'], row['Greedy input'] = machine_bound
+        if status is not None:
+            fieldnames.append('Status')
+            row['Status'] = status.name
         writer = csv.DictWriter(f, fieldnames=fieldnames)
 
         writer.writeheader()
-        min_price = sum(price_array)
-        writer.writerow({'Price min value': min_price, 'Price for each machine': price_array, 'Time': run_time})
+        writer.writerow(row)
+
+
+def write_anytime_solution(model_path, component_number, offer_number, result, solver, run_time, new_file=False,
+                           pruned=False):
+    """
+    This function writes an intermediate solution of the solver, as soon as it is found.
+    The solution is appended to a csv file with the time it was found after, so we get the price over time, and
+    it is written as greedy input if it is cheaper than the one already there, so the best known solution is kept
+    even when the solver is stopped by the time limit.
+
+    Args:
+      model_path: The path to the location of the MiniZinc model file
+      component_number: The minimum number of main component that will be deployed
+      offer_number: The number of offers that is used for this particular solution
+      result: The MiniZinc result with the intermediate solution
+      solver: The name of the solver that found the solution
+      run_time: The time since the start of the solve, in seconds
+      new_file: If it is True, the csv file is started again (it is the first solution of the solve)
+      pruned: If it is True, the solution was found with the pruned offers, so the types are translated
+    """
+    create_directory(f"Output\\MiniZinc_Output\\{solver}")
+    file = f"Output\\MiniZinc_Output\\{solver}\\{get_model_name(model_path)}" \
+           f"{component_number}_Offers{offer_number}_{solver}_Anytime.csv"
+    with open(file, mode='w' if new_file else 'a', newline='') as f:
+        fieldnames = ['Price min value', 'Price for each machine', 'Time', 'Timestamp']
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+
+        if new_file:
+            writer.writeheader()
+        writer.writerow({'Price min value': sum(result['price']), 'Price for each machine': result['price'],
+                         'Time': run_time, 'Timestamp': datetime.now().isoformat()})
+
+    update_greedy_input(model_path, component_number, offer_number, result['a'], result['price'],
+                        get_type_array(model_path, offer_number, result['t'], pruned))
+
+
+def write_portfolio_winner(model_path, component_number, offer_number, solver, status, run_time):
+    """
+    This function appends to a csv file the solver that won the portfolio for the given problem.
+
+    Args:
+      model_path: The path to the location of the MiniZinc model file
+      component_number: The minimum number of main component that will be deployed
+      offer_number: The number of offers that is used for this particular solution
+      solver: The name of the solver that found the best solution
+      status: The MiniZinc status of the best solution (optimal or just satisfied)
+      run_time: Integer value that represents the runtime of the portfolio, in seconds
+    """
+    create_directory("Output\\MiniZinc_Output\\portfolio")
+    file = f"Output\\MiniZinc_Output\\portfolio\\{get_model_name(model_path)}_Winners.csv"
+    write_header = not os.path.exists(file)
+    with open(file, mode='a', newline='') as f:
+        fieldnames = ['Instances', 'Offers', 'Solver', 'Status', 'Time']
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+
+        if write_header:
+            writer.writeheader()
+        writer.writerow({'Instances': component_number, 'Offers': offer_number, 'Solver': solver,
+                         'Status': status.name, 'Time': run_time})
 
 
 def create_greedy_input(model_path, component_number, offer_number, assignment_matrix, price_array, type_array):
@@ -112,15 +753,39 @@ def create_greedy_input(model_path, component_number, offer_number, assignment_m
       type_array: The type array that corresponds to the given model
     """
     create_directory("Input\\Greedy_Input")
-    model_path = model_path.replace('Models\\', '')
-    file = f"Input\\Greedy_Input\\{model_path.replace('.mzn', '')}{component_number}_Offers{offer_number}_Input.json"
+    # The solutions of every model of the problem are used in the same way by the greedy algorithms
+    file = f"Input\\Greedy_Input\\{get_problem_name(model_path)}{component_number}_Offers{offer_number}_Input.json"
     data = {
         "Assignment Matrix": assignment_matrix,
         "Price Array": price_array,
         "Type Array": type_array
     }
-    with open(file, 'w') as f:
+    # The file is written to a temporary file first, so the greedy bounds computed at the same time never read a
+    # partly written file
+    with open(f"{file}.tmp", 'w') as f:
         json.dump(data, f)
+    os.replace(f"{file}.tmp", file)
+
+
+def update_greedy_input(model_path, component_number, offer_number, assignment_matrix, price_array, type_array):
+    """
+    This function writes a solution as greedy input only if it is cheaper than the one already there (see
+    create_greedy_input), it is used for the solutions that are not proven optimal
+
+    Args:
+      model_path: The path to the location of the MiniZinc model file
+      component_number: The minimum number of main component that will be deployed
+      offer_number: The number of offers that is used for this particular solution
+      assignment_matrix: The assignment matrix obtained by solving the given model
+      price_array: The price array that corresponds to the given model
+      type_array: The type array that corresponds to the given model
+    """
+    file = f"Input\\Greedy_Input\\{get_problem_name(model_path)}{component_number}_Offers{offer_number}_Input.json"
+    if os.path.exists(file):
+        with open(file) as f:
+            if sum(json.load(f)['Price Array']) <= sum(price_array):
+                return
+    create_greedy_input(model_path, component_number, offer_number, assignment_matrix, price_array, type_array)
 
 
 def create_directory(directory_name):
@@ -139,25 +804,27 @@ if __name__ == '__main__':
     lower_bound = int(input(f"Introduce the lower bound for the number of {problem_name} instances:\n"))
     upper_bound = int(input(f"Introduce the upper bound for the number of {problem_name} instances:\n"))
     time_limit = int(input("Introduce the time limit(in seconds) for each problem\n"))
-    model_file = f"Models\\{problem_name}.mzn"
+    portfolio = input("Race all the solvers on each problem and keep the best one? (yes/no)\n") == "yes"
+    greedy_bound = input("Use the greedy solutions as an upper bound for the price? (yes/no)\n") == "yes"
+    greedy_machines = input("Use the number of machines of the greedy solutions as M when it is smaller? "
+                            "(yes/no)\n") == "yes"
+    pruned = input("Leave out the offers that are dominated by a cheaper one? (yes/no)\n") == "yes"
+    in_memory = input("Pass the data directly to MiniZinc, without DZN files? (yes/no)\n") == "yes"
+    symmetry = input("Use the model with symmetry breaking and redundant constraints? (yes/no)\n") == "yes"
+    generated = input("Use the models generated from the problem description? (yes/no)\n") == "yes"
+    anytime = input("Write every improving solution while the solvers run? (yes/no)\n") == "yes"
+    if generated:
+        write_models(f"Input\\Problem_Description\\{problem_name}.json", problem_name)
+        model_file = f"Models\\Generated\\{problem_name}{SYMMETRY_SUFFIX if symmetry else ''}.mzn"
+    else:
+        model_file = f"Models\\{problem_name}{SYMMETRY_SUFFIX if symmetry else ''}.mzn"
     solvers = ["chuffed", "gecode", "or-tools"]
     offers_numbers = [20, 40, 250, 500]
-    for solver in solvers:
-        stop = False
-        for component_instances in range(lower_bound, upper_bound):
-            if stop:
-                break
-            for number in offers_numbers:
-                output, runtime = solve_model_minizinc(model_file, component_instances, solver, number)
-                # If a run with 20 offers goes over the time limit there is no purpose to further test
-                if runtime >= time_limit and number == 20:
-                    stop = True
-                    break
-                # If the runtime is beaten at any other value than 20, it could mean we will miss some solutions
-                # For ex: wordpress 3 offers 40 -> time limit ( it means for sure 250 and 500 will also beat the limit)
-                # But, at the same time we would still have to check wordpress 4 offers 20 and so on..
-                elif runtime >= time_limit:
-                    break
-                write_output(model_file, component_instances, number, output['price'], runtime, solver)
-                create_greedy_input(model_file, component_instances, number,
-                                    output['a'], output['price'], output['t'])
+    if portfolio:
+        asyncio.run(solve_all_portfolio(model_file, solvers, offers_numbers, lower_bound, upper_bound, time_limit,
+                                        greedy_bound, pruned, in_memory, greedy_machines, anytime))
+    else:
+        workers = int(input("Introduce the number of problems that are solved at the same time\n"))
+        asyncio.run(solve_all_minizinc(model_file, solvers, offers_numbers, lower_bound, upper_bound,
+                                       time_limit, workers, greedy_bound, pruned, in_memory, greedy_machines,
+                                       anytime))
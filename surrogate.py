@@ -1,25 +1,54 @@
+import asyncio
 import csv
+import itertools
+import json
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
 from minizinc import Instance, Model, Solver
 
+from lower_bound import get_minimum_instances, is_simple_problem
+from mzn import SURROGATE_DIRECTORY, generate_surrogate_model, write_model
+
 """
 This file is used to run a surrogate problem needed before solving the main one.
 We solve it with the MiniZinc Python Interface and write the results to a csv file.
 The file will contain the relationship between the number of wordpress components and the 
 number of virtual machines that are needed for deployment. (3 wordpress - 8 machines, 4 wordpress - 10 machines, ...)
+
+When the problem has only restrictions on the number of instances (like Wordpress), the surrogate problem is solved
+directly in Python, without MiniZinc (see lower_bound.py). Otherwise, the instances are solved in parallel and the
+result for a smaller number of instances is used as a lower bound for the bigger ones.
 """
 
 
-def solve_surrogate_minizinc(model_path, problem_instances_number, solver):
+def get_objective_expression(model_path):
     """
-    This function is used to solve the model given as parameter, using the specified solver.
+    This function finds the expression that is minimized by the model given as parameter
+
+    Args:
+      model_path: The path to the location of the MiniZinc model file
+
+    Returns:
+       expression: The text of the minimized expression, or None if the model doesn't minimize anything
+    """
+    with open(model_path) as f:
+        match = re.search(r'solve\s+minimize\s+(.+?);', f.read(), re.DOTALL)
+    return match.group(1).strip() if match else None
+
+
+def create_surrogate_instance(model_path, problem_instances_number, solver, objective_bound=None):
+    """
+    This function builds the instance of the surrogate model given as parameter, using the specified solver.
 
     Args:
       model_path: The path to the location of the MiniZinc model file
       problem_instances_number: The minimum number of main component that will be deployed
       solver: The name of the solver that will be used to find the solution
+      objective_bound: If it is given, only the solutions with an objective at least equal to it are searched
 
     Returns:
-       result: A MiniZinc object, that contains the result of the model given as parameter
+       instance: A MiniZinc instance, with all the input data assigned
     """
     # Load the model from the corresponding file
     surrogate = Model(model_path)
@@ -29,10 +58,73 @@ def solve_surrogate_minizinc(model_path, problem_instances_number, solver):
     instance = Instance(solver, surrogate)
     # Assign the number of wordpress instances to n
     instance["n"] = problem_instances_number
+    # The result for fewer instances is a lower bound, since every solution for n instances is also one for n - 1
+    expression = get_objective_expression(model_path) if objective_bound is not None else None
+    if expression is not None:
+        instance.add_string(f"constraint {expression} >= {objective_bound};")
+    return instance
+
+
+def solve_surrogate_minizinc(model_path, problem_instances_number, solver, objective_bound=None):
+    """
+    This function is used to solve the model given as parameter, using the specified solver.
+
+    Args:
+      model_path: The path to the location of the MiniZinc model file
+      problem_instances_number: The minimum number of main component that will be deployed
+      solver: The name of the solver that will be used to find the solution
+      objective_bound: If it is given, only the solutions with an objective at least equal to it are searched
+
+    Returns:
+       result: A MiniZinc object, that contains the result of the model given as parameter
+    """
+    instance = create_surrogate_instance(model_path, problem_instances_number, solver, objective_bound)
     result = instance.solve()
     return result
 
 
+async def solve_surrogate_minizinc_async(model_path, problem_instances_number, solver, objective_bound=None):
+    """
+    This function is the asynchronous version of solve_surrogate_minizinc, so more instances can be solved at once.
+
+    Args:
+      model_path: The path to the location of the MiniZinc model file
+      problem_instances_number: The minimum number of main component that will be deployed
+      solver: The name of the solver that will be used to find the solution
+      objective_bound: If it is given, only the solutions with an objective at least equal to it are searched
+
+    Returns:
+       result: A MiniZinc object, that contains the result of the model given as parameter
+    """
+    instance = create_surrogate_instance(model_path, problem_instances_number, solver, objective_bound)
+    result = await instance.solve_async()
+    return result
+
+
+def get_surrogate_results_python(problem_file, component_id, lower_bound, upper_bound):
+    """
+    This function solves the surrogate problem without MiniZinc, for every number of instances between the bounds
+
+    Args:
+      problem_file: The path to the file that contains the problem description
+      component_id: The id of the main component
+      lower_bound: Integer value that represents the minimum number of instances that can be deployed in the system
+      upper_bound: Integer value that represents the maximum number of instances that can be deployed in the system
+
+    Returns:
+       solution_dict: A dictionary with the number of machines for every number of instances that has a solution
+    """
+    with open(problem_file) as f:
+        problem = json.load(f)
+    solution_dict = {}
+    for component_instances in range(lower_bound, upper_bound + 1):
+        instances = get_minimum_instances(len(problem['components']), problem['restrictions'], component_id,
+                                          component_instances)
+        if instances is not None:
+            solution_dict[component_instances] = sum(instances)
+    return solution_dict
+
+
 def write_csv(file, result_dict, component):
     """
     This function writes to a csv file the results passed as parameter for the given component
@@ -68,19 +160,165 @@ def get_surrogate_results(model, solver, lower_bound, upper_bound):
        result: A MiniZinc object, that contains the result of the model given as parameter
     """
     solution_dict = {}
+    objective_bound = None
     for component_instances in range(lower_bound, upper_bound + 1):
-        solution = solve_surrogate_minizinc(model, component_instances, solver)
+        solution = solve_surrogate_minizinc(model, component_instances, solver, objective_bound)
         solution_dict[component_instances] = solution['objective']
+        objective_bound = solution['objective']
     return solution_dict
 
 
+async def get_surrogate_results_async(model, solver, lower_bound, upper_bound, workers):
+    """
+    This function solves the instances of the surrogate problem in parallel, at most 'workers' at the same time
+    When an instance is started, the best result already found for a smaller number of instances is used as a bound
+
+    Args:
+      model: The path to the location of the MiniZinc model file
+      solver: The name of the solver that will be used to find the solution
+      lower_bound: Integer value that represents the minimum number of instances that can be deployed in the system
+      upper_bound: Integer value that represents the maximum number of instances that can be deployed in the system
+      workers: The maximum number of instances that are solved at the same time
+
+    Returns:
+       solution_dict: A dictionary with the number of machines for every number of instances
+    """
+    semaphore = asyncio.Semaphore(workers)
+    solution_dict = {}
+
+    async def solve_job(component_instances):
+        async with semaphore:
+            known_results = [objective for instances, objective in solution_dict.items()
+                             if instances < component_instances]
+            solution = await solve_surrogate_minizinc_async(model, component_instances, solver,
+                                                            max(known_results) if known_results else None)
+            solution_dict[component_instances] = solution['objective']
+
+    await asyncio.gather(*(solve_job(component_instances)
+                           for component_instances in range(lower_bound, upper_bound + 1)))
+    return dict(sorted(solution_dict.items()))
+
+
+class SurrogateRegistry:
+    """
+    The surrogate tables of the problems, each of them is read from its csv file only once
+    When the number of machines is needed for a number of instances that is not in the table, it is computed, added
+    to the table and the csv file is written again, so the next runs find it there.
+    """
+
+    def __init__(self, directory="Surrogate", problems_directory=os.path.join("Input", "Problem_Description"),
+                 solver="chuffed", component_id=0):
+        """
+        Args:
+            directory: The directory with the surrogate models and tables (<Problem>_Surrogate.mzn and .csv)
+            problems_directory: The directory with the problem descriptions
+            solver: The name of the solver used when a missing value is computed with MiniZinc
+            component_id: The id of the main component, whose number of instances is given
+        """
+        self.directory = directory
+        self.problems_directory = problems_directory
+        self.solver = solver
+        self.component_id = component_id
+        self.tables = {}
+
+    def get_table(self, problem_name):
+        """
+        Returns the surrogate table of a problem, reading it from its csv file the first time
+
+        Args:
+            problem_name: The name of the problem (for example Wordpress)
+
+        Returns:
+            table: A dictionary that maps a number of instances to the number of machines
+        """
+        if problem_name not in self.tables:
+            table = {}
+            file = os.path.join(self.directory, f"{problem_name}_Surrogate.csv")
+            if os.path.exists(file):
+                with open(file, 'r') as f:
+                    for row in csv.reader(itertools.islice(f, 1, None)):
+                        if row:
+                            table[int(row[0])] = int(row[1])
+            self.tables[problem_name] = table
+        return self.tables[problem_name]
+
+    def compute_machine_number(self, problem_name, component_number):
+        """
+        Solves the surrogate problem for a number of instances that is not in the table
+
+        Args:
+            problem_name: The name of the problem (for example Wordpress)
+            component_number: The number of instances of the main component
+
+        Returns:
+            value: The number of machines needed for the given number of instances
+        """
+        problem_file = os.path.join(self.problems_directory, f"{problem_name}.json")
+        with open(problem_file) as f:
+            problem = json.load(f)
+        if is_simple_problem(problem['restrictions']):
+            instances = get_minimum_instances(len(problem['components']), problem['restrictions'],
+                                              self.component_id, component_number)
+            if instances is None:
+                raise ValueError(f"The surrogate problem of {problem_name} has no solution for {component_number} "
+                                 f"instances.")
+            return sum(instances)
+
+        # Without a hand-written surrogate model, the one generated from the problem description is used
+        model_file = os.path.join(self.directory, f"{problem_name}_Surrogate.mzn")
+        if not os.path.exists(model_file):
+            model_file = os.path.join(SURROGATE_DIRECTORY, f"{problem_name}_Surrogate.mzn")
+            write_model(lambda: generate_surrogate_model(problem_file, self.component_id), model_file, problem_file)
+        known_results = [value for instances, value in self.get_table(problem_name).items()
+                         if instances < component_number]
+        # The lookup can be done while an event loop is running (in script.py), and the synchronous solve of MiniZinc
+        # starts its own event loop, so it runs in a separate thread
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            solution = executor.submit(solve_surrogate_minizinc, model_file, component_number, self.solver,
+                                       max(known_results) if known_results else None).result()
+        return solution['objective']
+
+    def get_machine_number(self, problem_name, component_number):
+        """
+        Returns the number of machines needed by a problem for the given number of instances of the main component
+
+        Args:
+            problem_name: The name of the problem (for example Wordpress)
+            component_number: The number of instances of the main component
+
+        Returns:
+            value: Integer value that represents the maximum number of virtual machines that can be deployed
+        """
+        table = self.get_table(problem_name)
+        if component_number not in table:
+            table[component_number] = self.compute_machine_number(problem_name, component_number)
+            self.tables[problem_name] = dict(sorted(table.items()))
+            write_csv(os.path.join(self.directory, f"{problem_name}_Surrogate.csv"), self.tables[problem_name],
+                      problem_name.lower())
+        return self.tables[problem_name][component_number]
+
+
+# The registry shared by all the solves of a run
+SURROGATE_REGISTRY = SurrogateRegistry()
+
+
 if __name__ == '__main__':
     problem_name = input("Introduce the problem name(should start with uppercase letter:\n")
     lower_bound = int(input(f"Introduce the lower bound for the number of {problem_name} instances:\n"))
     upper_bound = int(input(f"Introduce the upper bound for the number of {problem_name} instances:\n"))
 
     Surrogate = f"Surrogate\\{problem_name}_Surrogate.mzn"
+    problem_file = f"Input\\Problem_Description\\{problem_name}.json"
+    # The id of the main component, whose number of instances is given
+    component_id = 0
+    workers = 4
 
-    surrogate_results = get_surrogate_results(Surrogate, "chuffed", lower_bound, upper_bound)
+    with open(problem_file) as f:
+        restrictions = json.load(f)['restrictions']
+    if is_simple_problem(restrictions):
+        surrogate_results = get_surrogate_results_python(problem_file, component_id, lower_bound, upper_bound)
+    else:
+        surrogate_results = asyncio.run(get_surrogate_results_async(Surrogate, "chuffed", lower_bound, upper_bound,
+                                                                    workers))
 
     write_csv(f"Surrogate\\{problem_name}_Surrogate.csv", surrogate_results, f"{problem_name.lower()}")
@@ -0,0 +1,84 @@
+import numpy as np
+
+from assignment_matrix import AssignmentMatrix
+
+"""
+Checks that the copies, the trials and the new columns of the assignment matrix keep its values, the number of
+instances of every component and the free space of the machines consistent.
+"""
+
+REQUIREMENTS = np.array([[2, 4], [1, 2], [4, 1]], dtype=np.int64)
+CAPACITIES = np.array([[8, 8], [8, 8], [4, 4]], dtype=np.int64)
+
+
+def build_matrix():
+    return AssignmentMatrix.from_list([[1, 0, 0], [0, 1, 1], [1, 0, 0]])
+
+
+def test_copy_is_independent():
+    matrix = build_matrix()
+    copy = matrix.copy()
+    copy[0, 1] = 1
+    copy[2, 0] = 0
+    assert matrix.to_list() == [[1, 0, 0], [0, 1, 1], [1, 0, 0]]
+    assert matrix.frequencies().tolist() == [1, 2, 1]
+    assert copy.to_list() == [[1, 1, 0], [0, 1, 1], [0, 0, 0]]
+    assert copy.frequencies().tolist() == [2, 2, 0]
+
+    # The original matrix can also be modified after the copy without changing it
+    matrix[1, 0] = 1
+    assert copy[1, 0] == 0
+    assert matrix.pop_changes() == [(1, 0)]
+    assert copy.pop_changes() == [(0, 1), (2, 0)]
+
+
+def test_trial_restores_the_matrix():
+    matrix = build_matrix()
+    matrix.track_free_space(CAPACITIES, REQUIREMENTS)
+    free_space = [matrix.free_space(column).tolist() for column in range(matrix.columns)]
+    assert free_space == [[2, 3], [7, 6], [3, 2]]
+
+    with matrix.trial(0, 1):
+        assert matrix[0, 1] == 1
+        assert matrix.frequency(0) == 2
+        assert matrix.free_space(1).tolist() == [5, 2]
+    assert matrix.to_list() == [[1, 0, 0], [0, 1, 1], [1, 0, 0]]
+    assert matrix.frequencies().tolist() == [1, 2, 1]
+    assert [matrix.free_space(column).tolist() for column in range(matrix.columns)] == free_space
+    assert matrix.pop_changes() == []
+
+
+def test_trial_restores_the_matrix_after_an_error():
+    matrix = build_matrix()
+    try:
+        with matrix.trial(2, 0, 0):
+            raise ValueError
+    except ValueError:
+        pass
+    assert matrix[2, 0] == 1
+    assert matrix.frequency(2) == 1
+
+
+def test_append_column_grows_the_array():
+    matrix = build_matrix()
+    # The array of a matrix built from a list has no free column, so the first append has to copy it
+    matrix.append_column(1)
+    assert matrix.columns == 4
+    matrix.append_column(2)
+    matrix.append_column(0)
+    assert matrix.to_list() == [[1, 0, 0, 0, 0, 1], [0, 1, 1, 1, 0, 0], [1, 0, 0, 0, 1, 0]]
+    assert matrix.frequencies().tolist() == [2, 3, 2]
+    assert matrix.pop_changes() == [(1, 3), (2, 4), (0, 5)]
+
+
+def test_append_column_on_a_copy():
+    matrix = build_matrix()
+    matrix.append_column(1)
+    # The array still has free columns, but it is shared with the copy
+    copy = matrix.copy()
+    copy.append_column(0)
+    matrix.append_column(2)
+    assert copy.to_list() == [[1, 0, 0, 0, 1], [0, 1, 1, 1, 0], [1, 0, 0, 0, 0]]
+    assert matrix.to_list() == [[1, 0, 0, 0, 0], [0, 1, 1, 1, 0], [1, 0, 0, 0, 1]]
+    assert copy.frequencies().tolist() == [2, 3, 1]
+    assert matrix.frequencies().tolist() == [1, 3, 2]
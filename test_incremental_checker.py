@@ -0,0 +1,44 @@
+import glob
+
+import pytest
+
+import main
+from assignment_matrix import AssignmentMatrix
+from offer_catalog import OfferCatalog
+
+"""
+Checks that the incremental checker finds the same false constraints as a full check, while the handle functions
+modify the matrix like in get_final_matrix.
+"""
+
+PROBLEM_FILE = "Input/Problem_Description/Wordpress.json"
+MINIZINC_SOLUTIONS = sorted(glob.glob("Input/Greedy_Input/Wordpress*_Offers20_Input.json"))
+
+
+@pytest.mark.parametrize("component_goal", [None, 10])
+@pytest.mark.parametrize("check_new_columns", ["Yes", "No"])
+@pytest.mark.parametrize("minizinc_solution", MINIZINC_SOLUTIONS)
+def test_incremental_check_matches_the_full_check(minizinc_solution, check_new_columns, component_goal):
+    components_list = main.get_components(PROBLEM_FILE)
+    constraints_list = main.compile_constraints(main.get_constraints(PROBLEM_FILE))
+    offers_list = OfferCatalog(main.get_offers("Input/Offers/offers_20.json"))
+    existing_solution = main.parse_existing_solution(minizinc_solution)
+    initial_matrix = AssignmentMatrix.from_list(existing_solution['Assignment Matrix'])
+    types = existing_solution['Type Array']
+
+    new_matrix = initial_matrix.copy()
+    new_matrix.append_column(0)
+    while component_goal and new_matrix.frequency(0) < component_goal:
+        new_matrix.append_column(0)
+
+    checker = main.IncrementalChecker(constraints_list, 0)
+    while True:
+        false_constraints = checker.check(new_matrix)
+        assert false_constraints == main.check_constraints(constraints_list, new_matrix, 0)
+        if not false_constraints:
+            break
+        new_matrix = main.handle_false_constraints(false_constraints, new_matrix, types, 0, components_list,
+                                                   constraints_list, offers_list, initial_matrix, check_new_columns)
+        # Like in get_final_matrix, a message means that the constraints can't be fixed
+        if isinstance(new_matrix, str):
+            break
@@ -0,0 +1,66 @@
+import glob
+
+import numpy as np
+import pytest
+
+import main
+from assignment_matrix import AssignmentMatrix
+from lower_bound import PriceLowerBound
+from offer_catalog import OfferCatalog
+
+"""
+Checks that the local search keeps the greedy solutions feasible, and that they never get cheaper than the price
+lower bound.
+"""
+
+PROBLEM_FILE = "Input/Problem_Description/Wordpress.json"
+MINIZINC_SOLUTIONS = sorted(glob.glob("Input/Greedy_Input/Wordpress*_Offers20_Input.json")
+                            + glob.glob("Input/Greedy_Input/Wordpress*_Offers40_Input.json"))
+
+
+def get_false_constraints(constraints_list, matrix, components_number):
+    return [constraint for component_id in range(components_number)
+            for constraint in main.check_constraints(constraints_list, matrix, component_id)]
+
+
+@pytest.mark.parametrize("greedy_type", ["min_vm", "distinct_vm"])
+@pytest.mark.parametrize("minizinc_solution", MINIZINC_SOLUTIONS)
+def test_improved_solution_is_feasible(minizinc_solution, greedy_type):
+    offers_file = f"Input/Offers/offers_{minizinc_solution.split('_Offers')[1].split('_')[0]}.json"
+    components_list = main.get_components(PROBLEM_FILE)
+    constraints_list = main.compile_constraints(main.get_constraints(PROBLEM_FILE))
+    offers_list = OfferCatalog(main.get_offers(offers_file))
+    initial_columns = len(main.parse_existing_solution(minizinc_solution)['Type Array'])
+
+    result = main.get_greedy_solution(PROBLEM_FILE, offers_file, minizinc_solution, 0, None, greedy_type)
+    improved = main.get_greedy_solution(PROBLEM_FILE, offers_file, minizinc_solution, 0, None, greedy_type, 10)
+    assert not isinstance(improved, str)
+    matrix = AssignmentMatrix.from_list(result['Assignment Matrix'])
+    improved_matrix = AssignmentMatrix.from_list(improved['Assignment Matrix'])
+
+    # The same instances are deployed and no constraint is broken by the moves
+    assert improved_matrix.frequencies().tolist() == matrix.frequencies().tolist()
+    false_constraints = get_false_constraints(constraints_list, matrix, len(components_list))
+    assert all(constraint in false_constraints
+               for constraint in get_false_constraints(constraints_list, improved_matrix, len(components_list)))
+    for column in range(improved_matrix.columns):
+        components = improved_matrix.deployed_components(column)
+        assert not any(other_id in constraints_list.component_conflicts.get(component_id, [])
+                       for component_id in components for other_id in components)
+
+    # The new machines are not empty and have the cheapest offer that fits their components
+    resources = [resource for resource in components_list[0] if resource != 'Name']
+    for column in range(initial_columns, improved_matrix.columns):
+        components = improved_matrix.deployed_components(column)
+        assert components
+        offer = offers_list[improved['Type Array'][column]]
+        used = np.sum([[components_list[component_id][resource] for resource in resources]
+                       for component_id in components], axis=0)
+        assert all(offer[resource] >= amount for resource, amount in zip(resources, used))
+        assert offer['Price'] == improved['Price Array'][column]
+
+    price = sum(improved['Price Array'])
+    assert price <= sum(result['Price Array'])
+    lower_bound = PriceLowerBound(PROBLEM_FILE, components_list, offers_list).get_lower_bound(
+        improved_matrix.frequency(0))
+    assert lower_bound is None or price >= lower_bound
@@ -0,0 +1,68 @@
+import json
+
+import main
+from offer_catalog import OfferCatalog, load_offers, prune_offers
+
+"""
+Checks that the offers keep the values of the offers file, when they are parsed and when they are read from the cache.
+"""
+
+
+def write_offers(tmp_path, offers):
+    file = tmp_path / "offers.json"
+    file.write_text(json.dumps(offers))
+    return str(file)
+
+
+def test_fractional_values_survive_the_cache(tmp_path):
+    file = write_offers(tmp_path, {
+        "t3.nano": {"cpu": 0.5, "memory": 512, "storage": 1000, "price": 0.0116},
+        "t3.micro": {"cpu": 1, "memory": 1024, "storage": 1000, "price": 0.0208}
+    })
+    expected = [
+        {'Cpu': 0.5, 'Memory': 512, 'Storage': 1000, 'Price': 0.0116},
+        {'Cpu': 1.0, 'Memory': 1024, 'Storage': 1000, 'Price': 0.0208}
+    ]
+    # The first load parses the file and writes the cache, the second one reads the cache
+    assert main.get_offers(file) == expected
+    assert (tmp_path / "offers.json.npy").is_file()
+    assert main.get_offers(file) == expected
+    assert not (tmp_path / "offers.json.npy.tmp").exists()
+
+
+def test_integer_values_stay_integers(tmp_path):
+    file = write_offers(tmp_path, [{"cpu": 2, "memory": 4, "storage": 1000, "price": 128}])
+    for _ in range(2):
+        offers = main.get_offers(file)
+        assert offers == [{'Cpu': 2, 'Memory': 4, 'Storage': 1000, 'Price': 128}]
+        assert all(type(value) is int for value in offers[0].values())
+    assert load_offers(file)['Price'].dtype.kind == 'i'
+
+
+def test_catalog_compares_fractional_prices():
+    offers_list = [
+        {'Cpu': 1, 'Memory': 1024, 'Storage': 1000, 'Price': 0.0208},
+        {'Cpu': 1, 'Memory': 1024, 'Storage': 1000, 'Price': 0.0116}
+    ]
+    assert OfferCatalog(offers_list).cheapest_fit({'Cpu': 0.5, 'Memory': 512, 'Storage': 500}) == 1
+
+
+def test_pruning_keeps_the_cheaper_offer():
+    offers_list = [
+        {'Cpu': 1, 'Memory': 1024, 'Storage': 1000, 'Price': 0.0208},
+        {'Cpu': 1, 'Memory': 1024, 'Storage': 1000, 'Price': 0.0116}
+    ]
+    assert prune_offers(offers_list) == ([offers_list[1]], [1])
+
+
+def test_cheapest_fit_matches_a_full_scan():
+    offers_list = main.get_offers("Input/Offers/offers_500.json")
+    catalog = OfferCatalog(offers_list)
+    for cpu in [0, 1, 2, 4, 16, 64]:
+        for memory in [0, 1000, 4000, 16000, 64000]:
+            for storage in [0, 1000, 2000, 8000]:
+                requirements = {'Cpu': cpu, 'Memory': memory, 'Storage': storage}
+                fits = [offer_id for offer_id, offer in enumerate(offers_list)
+                        if all(offer[resource] >= amount for resource, amount in requirements.items())]
+                expected = min(fits, key=lambda offer_id: offers_list[offer_id]['Price']) if fits else -1
+                assert catalog.cheapest_fit(requirements) == expected